@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+
+# USAGE: bowtie2_index_cache.py <fetch|store|list|verify|prune> --store <dir> [options]
+#
+# Persistent store of bowtie2 indexes, keyed by a hash of the assembly content, the bowtie2 version and the
+# bowtie2-build arguments. Entries are published atomically (built in a temporary directory and renamed), so
+# several pipeline runs can share one store. Least recently fetched entries are pruned first.
+
+import sys
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shutil
+import time
+
+from cache_store import (
+    MANIFEST,
+    copy_file,
+    failed_files,
+    last_used,
+    parse_duration,
+    parse_size,
+    remove_entry,
+    remove_idle_entry,
+    sha256_file,
+    tmp_dir,
+    touch,
+)
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_store(subparser):
+        subparser.add_argument("-s", "--store", required=True, metavar="DIR", help="Index store directory.")
+
+    def add_key(subparser):
+        subparser.add_argument(
+            "-a", "--assembly", required=True, metavar="FILE", help="(Compressed) assembly FASTA the index is built from."
+        )
+        subparser.add_argument("-v", "--version", required=True, type=str, help="bowtie2 version.")
+        subparser.add_argument(
+            "-b", "--build_args", required=False, type=str, default="", help="Arguments passed to bowtie2-build."
+        )
+        subparser.add_argument(
+            "-p", "--prefix", required=True, type=str, help="Index basename, e.g. 'bt2_index_base'."
+        )
+
+    def add_max_size(subparser, required):
+        subparser.add_argument(
+            "-m",
+            "--max_size",
+            required=required,
+            type=parse_size,
+            help="Maximum total size of the store, e.g. '500G'; least recently used entries are removed first.",
+        )
+        subparser.add_argument(
+            "--min_idle",
+            required=False,
+            type=parse_duration,
+            default=parse_duration("2d"),
+            help="Entries fetched more recently than this, e.g. '12h' or '2d', may still be in use by a running pipeline and are never pruned (default: 2d).",
+        )
+
+    fetch = subparsers.add_parser("fetch", help="Symlink a cached index into the working directory, exit 1 on miss.")
+    add_store(fetch)
+    add_key(fetch)
+
+    store = subparsers.add_parser("store", help="Publish an index from the working directory into the store.")
+    add_store(store)
+    add_key(store)
+    add_max_size(store, False)
+
+    list_entries = subparsers.add_parser("list", help="List entries with size, assembly and last use.")
+    add_store(list_entries)
+
+    verify = subparsers.add_parser("verify", help="Check the checksums of all entries.")
+    add_store(verify)
+    verify.add_argument("--remove", action="store_true", help="Remove entries that fail verification.")
+
+    prune = subparsers.add_parser("prune", help="Remove least recently used entries until the store fits the size cap.")
+    add_store(prune)
+    add_max_size(prune, True)
+
+    return parser.parse_args(args)
+
+
+def entry_key(args):
+    # the assembly is hashed decompressed, so that re-compression does not invalidate the index
+    digest = hashlib.sha256()
+    digest.update(sha256_file(args.assembly, decompress=True).encode())
+    digest.update(b"\0" + args.version.encode() + b"\0" + args.build_args.encode())
+    return digest.hexdigest()
+
+
+def entries(store):
+    for path in sorted(glob.glob(os.path.join(store, "*", MANIFEST))):
+        entry = os.path.dirname(path)
+        with open(path) as infile:
+            manifest = json.load(infile)
+        yield entry, manifest
+
+
+def fetch(args):
+    entry = os.path.join(args.store, entry_key(args))
+    if not os.path.isfile(os.path.join(entry, MANIFEST)):
+        print("Index cache miss for " + args.assembly, file=sys.stderr)
+        return 1
+    with open(os.path.join(entry, MANIFEST)) as infile:
+        manifest = json.load(infile)
+    failed = failed_files(entry, manifest["files"], checksum=False)
+    if failed:
+        print("Index cache entry " + entry + " was modified, e.g. " + failed[0], file=sys.stderr)
+        return 1
+    touch(entry)
+    for name in manifest["files"]:
+        os.symlink(os.path.abspath(os.path.join(entry, name)), args.prefix + name[len(manifest["prefix"]) :])
+    print("Index cache hit for " + args.assembly + ": " + entry, file=sys.stderr)
+    return 0
+
+
+def store(args):
+    os.makedirs(args.store, exist_ok=True)
+    key = entry_key(args)
+    entry = os.path.join(args.store, key)
+    if os.path.isfile(os.path.join(entry, MANIFEST)):
+        with open(os.path.join(entry, MANIFEST)) as infile:
+            manifest = json.load(infile)
+        if not failed_files(entry, manifest["files"], checksum=False):
+            touch(entry)
+            return 0
+        # an entry modified through the links of a task is replaced by the freshly built index
+        remove_entry(args.store, entry)
+
+    tmp_entry = tmp_dir(args.store)
+    files = {}
+    for path in sorted(glob.glob(args.prefix + "*")):
+        name = os.path.basename(path)
+        files[name] = copy_file(path, os.path.join(tmp_entry, name))
+    manifest = {
+        "key": key,
+        "prefix": os.path.basename(args.prefix),
+        "assembly": os.path.basename(args.assembly),
+        "bowtie2_version": args.version,
+        "build_args": args.build_args,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "files": files,
+    }
+    with open(os.path.join(tmp_entry, MANIFEST), "w") as outfile:
+        json.dump(manifest, outfile, indent=2)
+    touch(tmp_entry)
+    try:
+        os.rename(tmp_entry, entry)
+    except OSError:
+        # published concurrently by another run
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+
+    if args.max_size:
+        prune_store(args.store, args.max_size, args.min_idle, keep=entry)
+    return 0
+
+
+def entry_size(manifest):
+    return sum(file["size"] for file in manifest["files"].values())
+
+
+def list_store(args):
+    print("key", "assembly", "bowtie2_version", "size", "created", "last_used", sep="\t")
+    for entry, manifest in entries(args.store):
+        print(
+            manifest["key"],
+            manifest["assembly"],
+            manifest["bowtie2_version"],
+            entry_size(manifest),
+            manifest["created"],
+            time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(last_used(entry))),
+            sep="\t",
+        )
+    return 0
+
+
+def verify(args):
+    n_failed = 0
+    for entry, manifest in entries(args.store):
+        failed = failed_files(entry, manifest["files"], checksum=True)
+        print(manifest["key"], "FAILED " + ",".join(failed) if failed else "OK", sep="\t")
+        if failed:
+            n_failed += 1
+            if args.remove:
+                remove_entry(args.store, entry)
+    return 1 if n_failed and not args.remove else 0
+
+
+def prune_store(store, max_size, min_idle, keep=None):
+    # entries used within min_idle are kept even if the store stays above max_size
+    store_entries = sorted(entries(store), key=lambda item: last_used(item[0]))
+    total = sum(entry_size(manifest) for entry, manifest in store_entries)
+    for entry, manifest in store_entries:
+        if total <= max_size:
+            break
+        if entry == keep or not remove_idle_entry(store, entry, min_idle):
+            continue
+        total -= entry_size(manifest)
+        print("Pruned " + manifest["key"] + " (" + manifest["assembly"] + ")", file=sys.stderr)
+    if total > max_size:
+        print(
+            "Index store exceeds the size cap, remaining entries were used within the last "
+            + str(int(min_idle))
+            + " seconds.",
+            file=sys.stderr,
+        )
+
+
+def main(args=None):
+    args = parse_args(args)
+    if args.command == "fetch":
+        return fetch(args)
+    if args.command == "store":
+        return store(args)
+    if args.command == "list":
+        return list_store(args)
+    if args.command == "verify":
+        return verify(args)
+    prune_store(args.store, args.max_size, args.min_idle)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+# Shared helpers of the persistent stores bowtie2_index_cache.py and midas2_db_cache.py (imported, not run).
+#
+# Entries are directories published atomically (written to a temporary directory in the store and renamed) with a
+# manifest of size, mtime and sha256 of every file and a 'last_used' file touched on fetch. Cached files are
+# read-only and handed to tasks as symlinks. Tasks running as root can still write through these links, so a fetch
+# re-hashes every file whose size or mtime differs from the manifest and treats a mismatch as a miss.
+
+import argparse
+import gzip
+import hashlib
+import os
+import re
+import shutil
+import stat
+import time
+import uuid
+
+MANIFEST = "manifest.json"
+LAST_USED = "last_used"
+
+
+def parse_size(value):
+    # accepts plain bytes and sizes like '500G', '1.5TB' or '500.GB'
+    match = re.match(r"^([0-9.]+?)\.?\s*([KMGT]?)B?$", value.strip().upper())
+    if not match:
+        raise argparse.ArgumentTypeError("invalid size: " + value)
+    return int(float(match.group(1)) * 1024 ** " KMGT".index(match.group(2) or " "))
+
+
+def parse_duration(value):
+    # accepts plain seconds and durations like '90m', '12h' or '2d'
+    match = re.match(r"^([0-9.]+)\s*([SMHD]?)$", value.strip().upper())
+    if not match:
+        raise argparse.ArgumentTypeError("invalid duration: " + value)
+    return float(match.group(1)) * {"": 1, "S": 1, "M": 60, "H": 3600, "D": 86400}[match.group(2)]
+
+
+def sha256_file(path, decompress=False):
+    digest = hashlib.sha256()
+    opener = gzip.open if decompress and path.endswith(".gz") else open
+    with opener(path, "rb") as infile:
+        for chunk in iter(lambda: infile.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def tmp_dir(parent):
+    path = os.path.join(parent, ".tmp-" + uuid.uuid4().hex)
+    os.makedirs(path)
+    return path
+
+
+def copy_file(source, target):
+    # copy into an entry, make it read-only and return its manifest record
+    shutil.copyfile(source, target)
+    os.chmod(target, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+    return file_record(target)
+
+
+def file_record(path, sha256=None):
+    status = os.stat(path)
+    return {"size": status.st_size, "mtime_ns": status.st_mtime_ns, "sha256": sha256 or sha256_file(path)}
+
+
+def failed_files(directory, files, checksum):
+    # files with the size and mtime of the manifest are only hashed with checksum=True (verify); any write, also
+    # through a link by a task running as root, changes the mtime and makes fetch and store hash the file
+    failed = []
+    for name, file in files.items():
+        path = os.path.join(directory, name)
+        try:
+            status = os.stat(path)
+        except OSError:
+            failed.append(name)
+            continue
+        if status.st_size != file["size"]:
+            failed.append(name)
+        elif (checksum or status.st_mtime_ns != file.get("mtime_ns")) and sha256_file(path) != file["sha256"]:
+            failed.append(name)
+    return failed
+
+
+def last_used(entry):
+    try:
+        return os.stat(os.path.join(entry, LAST_USED)).st_mtime
+    except OSError:
+        return 0.0
+
+
+def touch(entry):
+    with open(os.path.join(entry, LAST_USED), "a"):
+        pass
+    os.utime(os.path.join(entry, LAST_USED), None)
+
+
+def remove_entry(store, entry, min_idle=None):
+    # rename first, so that concurrent fetches never see a partially removed entry
+    trash = os.path.join(store, ".trash-" + uuid.uuid4().hex)
+    try:
+        os.rename(entry, trash)
+    except OSError:
+        return False
+    # an entry fetched between the idle check and the rename is put back
+    if min_idle is not None and time.time() - last_used(trash) < min_idle:
+        os.rename(trash, entry)
+        return False
+    shutil.rmtree(trash, ignore_errors=True)
+    return True
+
+
+def remove_idle_entry(store, entry, min_idle):
+    # fetched files are symlinked into the tasks of a run, entries used within min_idle are never removed
+    if time.time() - last_used(entry) < min_idle:
+        return False
+    return remove_entry(store, entry, min_idle)
@@ -4,7 +4,7 @@ import pandas as pd
 import yaml
 import argparse
 
-def combine_midas2_reports(input_files, output_file):
+def combine_midas2_reports(input_files, output_file, pileup_summaries=None):
     # Read all MIDAS2 report files
     df_list = []
     for file in input_files:
@@ -14,6 +14,11 @@ def combine_midas2_reports(input_files, output_file):
     # Combine all dataframes
     combined_df = pd.concat(df_list, ignore_index=True)
 
+    # Add per-species pileup summaries from midas2_pileup_store.py
+    if pileup_summaries and 'species_id' in combined_df:
+        pileup_df = pd.concat([pd.read_csv(file, sep='\t') for file in pileup_summaries], ignore_index=True)
+        combined_df = combined_df.merge(pileup_df, on=['sample_name', 'species_id'], how='left')
+
     # Create a unique identifier combining sample_name and species_id
     combined_df['unique_id'] = combined_df['sample_name'].astype(str) + '_' + combined_df['species_id'].astype(str)
 
@@ -61,6 +66,29 @@ def combine_midas2_reports(input_files, output_file):
             'title': 'Continent',
             'description':'Source of reference genome in MIDAS2 database'}
     }
+    if 'pileup_sites' in combined_df:
+        headers.update({
+            'pileup_sites': {
+                'title': 'Pileup Sites',
+                'description':'Number of sites in the per-species pileup',
+                'format':'{:,.0f}',},
+            'pileup_covered_sites': {
+                'title': 'Pileup Covered Sites',
+                'description':'Number of pileup sites with depth above zero',
+                'format':'{:,.0f}',},
+            'pileup_total_depth': {
+                'title': 'Pileup Total Depth',
+                'description':'Total read depth across all pileup sites',
+                'format':'{:,.0f}',},
+            'pileup_mean_depth': {
+                'title': 'Pileup Mean Depth',
+                'description':'Mean read depth across all pileup sites',
+                'format':'{:,.1f}',},
+            'pileup_max_depth': {
+                'title': 'Pileup Max Depth',
+                'description':'Maximum read depth of a pileup site',
+                'format':'{:,.0f}',},
+        })
 
     # Convert the DataFrame to the required format
     data_yaml = combined_df.set_index('unique_id').to_dict(orient='index')
@@ -89,7 +117,8 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Combine MIDAS2 reports for MultiQC')
     parser.add_argument('-i', '--input', nargs='+', required=True, help='Input MIDAS2 report files')
     parser.add_argument('-y', '--yaml', required=True, help='Output YAML file for MultiQC')
+    parser.add_argument('-p', '--pileup_summaries', nargs='+', required=False, help='Per-species pileup summaries from midas2_pileup_store.py')
     
     args = parser.parse_args()
     
-    combine_midas2_reports(args.input, args.yaml)
\ No newline at end of file
+    combine_midas2_reports(args.input, args.yaml, args.pileup_summaries)
\ No newline at end of file
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+
+# USAGE: filter_assembly.py --assembly <contigs.fa(.gz)> --min_length <bp> --prefix <prefix>
+
+import sys
+import argparse
+import gzip
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-a", "--assembly", required=True, metavar="FILE", help="(Compressed) assembly FASTA."
+    )
+    parser.add_argument(
+        "-m",
+        "--min_length",
+        required=True,
+        type=int,
+        help="Minimum contig length, shorter contigs are dropped.",
+    )
+    parser.add_argument(
+        "-p",
+        "--prefix",
+        required=True,
+        type=str,
+        help="Output prefix: <prefix>.fa.gz, <prefix>.contig_lengths.tsv, <prefix>.manifest.tsv and <prefix>.filter_summary.tsv.",
+    )
+    return parser.parse_args(args)
+
+
+def read_fasta(infile):
+    # stream records without holding more than one contig in memory
+    name, header, lines = None, None, []
+    for line in infile:
+        if line.startswith(">"):
+            if header is not None:
+                yield name, header, lines
+            header = line
+            name = line[1:].split(None, 1)[0]
+            lines = []
+        else:
+            lines.append(line)
+    if header is not None:
+        yield name, header, lines
+
+
+def main(args=None):
+    args = parse_args(args)
+
+    opener = gzip.open if args.assembly.endswith(".gz") else open
+    counts = {"kept": [0, 0], "dropped": [0, 0]}
+    with opener(args.assembly, "rt") as infile, gzip.open(args.prefix + ".fa.gz", "wt", compresslevel=1) as fasta, open(
+        args.prefix + ".contig_lengths.tsv", "w"
+    ) as lengths, open(args.prefix + ".manifest.tsv", "w") as manifest:
+        print("contig", "length", "status", sep="\t", file=manifest)
+        for name, header, lines in read_fasta(infile):
+            length = sum(len(line.rstrip("\n\r")) for line in lines)
+            status = "kept" if length >= args.min_length else "dropped"
+            print(name, length, status, sep="\t", file=manifest)
+            counts[status][0] += 1
+            counts[status][1] += length
+            if status == "kept":
+                fasta.write(header)
+                fasta.writelines(lines)
+                print(name, length, sep="\t", file=lengths)
+
+    # reads are mapped against the unfiltered assembly and BAMs restricted to the contigs in <prefix>.contig_lengths.tsv
+    # (restrict_sam_contigs.sh), which counts the reads on dropped contigs per sample; the summary shows the dropped
+    # share of the assembly
+    total_bases = counts["kept"][1] + counts["dropped"][1]
+    with open(args.prefix + ".filter_summary.tsv", "w") as summary:
+        print("status", "contigs", "bases", "fraction_bases", sep="\t", file=summary)
+        for status, (n_contigs, n_bases) in counts.items():
+            print(status, n_contigs, n_bases, "%.4f" % (n_bases / total_bases if total_bases else 0.0), sep="\t", file=summary)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,21 +9,42 @@ import os.path
 import pandas as pd
 import csv
 import gzip
-import statistics
+import hashlib
+import json
+import os
+import tempfile
+import numpy as np
 
 from Bio import SeqIO
 
 
 def parse_args(args=None):
     parser = argparse.ArgumentParser()
-    parser.add_argument(
+    bins = parser.add_mutually_exclusive_group(required=True)
+    bins.add_argument(
         "-b",
         "--bins",
-        required=True,
         nargs="+",
         metavar="FILE",
         help="Bins: FASTA containing all contigs.",
     )
+    bins.add_argument(
+        "--contig2bin",
+        metavar="FILE",
+        help="Virtual bins instead of bin FASTA files: TSV without header (contig, bin), e.g. from DAS Tool or virtual_bins.py lists.",
+    )
+    parser.add_argument(
+        "--bin_extension",
+        required=False,
+        default=".fa",
+        help="With --contig2bin, extension appended to the bin IDs to get the bin names reported (default: .fa).",
+    )
+    parser.add_argument(
+        "--unbinned",
+        required=False,
+        metavar="NAME",
+        help="With --contig2bin, also report the contigs of the depth table not assigned to any bin, under this bin name.",
+    )
     parser.add_argument(
         "-d",
         "--depths",
@@ -40,71 +61,265 @@ def parse_args(args=None):
     parser.add_argument(
         "-m", "--binner", required=True, type=str, help="Binning method."
     )
-    return parser.parse_args(args)
+    parser.add_argument(
+        "-c",
+        "--cache_dir",
+        required=False,
+        metavar="DIR",
+        help="Optional directory to cache bin depths, keyed by the content of the depth table and of the bin FASTA.",
+    )
+    parser.add_argument(
+        "--cache_max_entries",
+        required=False,
+        type=int,
+        default=10000,
+        help="Maximum number of bins kept in the cache, least recently used entries are evicted first (default: 10000).",
+    )
+    parser.add_argument(
+        "-s",
+        "--stats",
+        required=False,
+        type=str,
+        default="",
+        help="Comma-separated list of additional bin statistics to compute in the same pass: "
+        + ", ".join(STATISTICS)
+        + " (default: none).",
+    )
+    parser.add_argument(
+        "--stats_format",
+        required=False,
+        choices=["long", "wide"],
+        default="long",
+        help="Write additional statistics as one long-format TSV (bin, sample, statistic, value) or as one TSV per statistic in the binDepths.tsv layout (default: long).",
+    )
+    parser.add_argument(
+        "--trim_fraction",
+        required=False,
+        type=float,
+        default=0.1,
+        help="Fraction of contigs cut from each end for the trimmed mean, 0 <= fraction < 0.5 (default: 0.1).",
+    )
+    args = parser.parse_args(args)
+    # at 0.5 or more nothing is left between the cut ends and the trimmed mean would be NaN
+    if not 0 <= args.trim_fraction < 0.5:
+        parser.error("--trim_fraction must be at least 0 and less than 0.5")
+    return args
+
+
+def trimmed_mean(depths, lengths, variances, trim_fraction):
+    n_cut = int(trim_fraction * depths.shape[0])
+    sorted_depths = np.sort(depths, axis=0)
+    return sorted_depths[n_cut : depths.shape[0] - n_cut].mean(axis=0)
+
+
+def pooled_var(depths, lengths, variances, trim_fraction):
+    # variance of per-base depth over all bases of the bin: within-contig variance plus spread of contig means
+    weighted_mean = np.average(depths, axis=0, weights=lengths)
+    return np.average(variances + (depths - weighted_mean) ** 2, axis=0, weights=lengths)
+
+
+# All statistics are computed on the (contigs x samples) depth matrix of one bin
+STATISTICS = {
+    "median": lambda depths, lengths, variances, trim_fraction: np.median(depths, axis=0),
+    "wmean": lambda depths, lengths, variances, trim_fraction: np.average(depths, axis=0, weights=lengths),
+    "pooled_var": pooled_var,
+    "trimmed_mean": trimmed_mean,
+    "covered_fraction": lambda depths, lengths, variances, trim_fraction: (depths > 0).mean(axis=0),
+}
+
+
+def open_text(file):
+    if file.endswith(".gz"):
+        return gzip.open(file, "rt")
+    return open(file, "rt")
+
 
+def hash_file(file, decompress=False):
+    # stream content into hash, decompressed so that re-gzipping an unchanged FASTA still hits the cache
+    digest = hashlib.sha256()
+    opener = gzip.open if decompress and file.endswith(".gz") else open
+    with opener(file, "rb") as infile:
+        for chunk in iter(lambda: infile.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-# Processing contig depths for each binner again, i.e. not the most efficient way, but ok
+
+def cache_lookup(cache_dir, key):
+    path = os.path.join(cache_dir, key + ".json")
+    try:
+        with open(path) as infile:
+            bin_stats = json.load(infile)["stats"]
+    except (OSError, ValueError, KeyError):
+        return None
+    # mark entry as recently used
+    os.utime(path, None)
+    return bin_stats
+
+
+def cache_store(cache_dir, key, bin_stats):
+    # write to temporary file and rename, so concurrent tasks never read partial entries
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    with os.fdopen(fd, "w") as outfile:
+        json.dump({"stats": bin_stats}, outfile)
+    os.replace(tmp_path, os.path.join(cache_dir, key + ".json"))
+
+
+def cache_evict(cache_dir, max_entries):
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(".json"):
+            path = os.path.join(cache_dir, name)
+            try:
+                entries.append((os.stat(path).st_mtime, path))
+            except OSError:
+                continue
+    if len(entries) <= max_entries:
+        return
+    entries.sort()
+    for mtime, path in entries[: len(entries) - max_entries]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def read_sample_names(depths_file, assembler, id):
+    sample_names = []
+    with gzip.open(depths_file, "rt") as infile:
+        header = next(csv.reader(infile, delimiter="\t"))
+    for sample in range(int((len(header) - 3) / 2)):
+        col_name = header[3 + 2 * sample]
+        # retrieve sample name: "<assembler>-<id>-<other sample_name>.bam"
+        sample_name = col_name[len(assembler) + 1 + len(id) + 1 : -4]
+        sample_names.append(sample_name)
+    return sample_names
+
+
+def read_contig_depths(depths_file):
+    # load contig lengths, depths and variances for all samples into arrays, indexed by contig name
+    df = pd.read_csv(depths_file, sep="\t", dtype={0: str})
+    contig_index = {name: i for i, name in enumerate(df.iloc[:, 0])}
+    lengths = df.iloc[:, 1].to_numpy(dtype=np.float64)
+    depths = df.iloc[:, 3::2].to_numpy(dtype=np.float64)
+    variances = df.iloc[:, 4::2].to_numpy(dtype=np.float64)
+    return contig_index, lengths, depths, variances
+
+
+def read_bins(args):
+    # (bin name, bin FASTA or None, contig names or None), contig names of bin FASTA files are only read when needed
+    if args.bins:
+        return [(os.path.basename(file), file, None) for file in args.bins]
+    bins = {}
+    with open(args.contig2bin) as infile:
+        for row in csv.reader(infile, delimiter="\t"):
+            if row:
+                bins.setdefault(row[1] + args.bin_extension, []).append(row[0])
+    if args.unbinned:
+        # the unbinned bin of DAS Tool holds all remaining contigs, only the contig names of the depth table are read
+        binned = set(contig for contigs in bins.values() for contig in contigs)
+        names = pd.read_csv(args.depths, sep="\t", usecols=[0], dtype=str).iloc[:, 0]
+        unbinned = [contig for contig in names if contig not in binned]
+        if unbinned:
+            bins[args.unbinned] = unbinned
+    return [(binname, None, contigs) for binname, contigs in bins.items()]
+
+
+def bin_contigs(file):
+    with open_text(file) as infile:
+        return [rec.id for rec in SeqIO.parse(infile, "fasta")]
+
+
+def compute_bin_stats(contigs, contig_depths, stats, trim_fraction):
+    contig_index, lengths, depths, variances = contig_depths
+    rows = np.array([contig_index[contig] for contig in contigs], dtype=np.intp)
+    bin_lengths, bin_depths, bin_variances = lengths[rows], depths[rows], variances[rows]
+    return {
+        stat: [str(float(value)) for value in STATISTICS[stat](bin_depths, bin_lengths, bin_variances, trim_fraction)]
+        for stat in stats
+    }
+
+
+# Processing contig depths for each binner again, i.e. not the most efficient way, but ok.
+# With --cache_dir, bins whose content was already processed against the same depth table are
+# reused and the depth table is only parsed if at least one bin is new or changed.
 
 
 def main(args=None):
     args = parse_args(args)
 
-    # load contig depths for all samples into dict (could use pandas as well)
-    sample_names = []
-    dict_contig_depths = {}
-    with gzip.open(args.depths, "rt") as infile:
-        reader = csv.reader(infile, delimiter="\t")
-        # process header
-        header = next(reader)
-        for sample in range(int((len(header) - 3) / 2)):
-            col_name = header[3 + 2 * sample]
-            # retrieve sample name: "<assembler>-<id>-<other sample_name>.bam"
-            sample_name = col_name[len(args.assembler) + 1 + len(args.id) + 1 : -4]
-            sample_names.append(sample_name)
-        # process contig depths
-        for row in reader:
-            contig_depths = []
-            for sample in range(int((len(row) - 3) / 2)):
-                contig_depths.append(float(row[3 + 2 * sample]))
-            dict_contig_depths[str(row[0])] = contig_depths
+    extra_stats = [stat for stat in args.stats.split(",") if stat]
+    for stat in extra_stats:
+        if stat not in STATISTICS:
+            sys.exit("Unknown statistic '" + stat + "', choose from: " + ", ".join(STATISTICS))
+    stats = ["median"] + [stat for stat in extra_stats if stat != "median"]
+    # the trimmed mean depends on the trim fraction, so it has to be part of its cache name
+    cache_names = {
+        stat: stat + "_" + str(args.trim_fraction) if stat == "trimmed_mean" else stat for stat in stats
+    }
 
-    # Initialize output files
+    sample_names = read_sample_names(args.depths, args.assembler, args.id)
     n_samples = len(sample_names)
-    with open(
-        args.assembler + "-" + args.binner + "-" + args.id + "-binDepths.tsv", "w"
-    ) as outfile:
+
+    if args.cache_dir:
+        os.makedirs(args.cache_dir, exist_ok=True)
+        # hashed decompressed like the bins, the gzip header of a regenerated depth table can differ
+        depths_hash = hash_file(args.depths, decompress=True)
+
+    # Initialize output files
+    prefix = args.assembler + "-" + args.binner + "-" + args.id
+    outfile_name = prefix + "-binDepths.tsv"
+    with open(outfile_name, "w") as outfile:
         print("bin", "\t".join(sample_names), sep="\t", file=outfile)
 
-    # for each bin, access contig depths and compute mean bin depth (for all samples)
-    for file in args.bins:
-        all_depths = [[] for i in range(n_samples)]
-
-        if file.endswith(".gz"):
-            with gzip.open(file, "rt") as infile:
-                for rec in SeqIO.parse(infile, "fasta"):
-                    contig_depths = dict_contig_depths[rec.id]
-                    for sample in range(n_samples):
-                        all_depths[sample].append(contig_depths[sample])
-        else:
-            with open(file, "rt") as infile:
-                for rec in SeqIO.parse(infile, "fasta"):
-                    contig_depths = dict_contig_depths[rec.id]
-                    for sample in range(n_samples):
-                        all_depths[sample].append(contig_depths[sample])
-
-        binname = os.path.basename(file)
-        with open(
-            args.assembler + "-" + args.binner + "-" + args.id + "-binDepths.tsv", "a"
-        ) as outfile:
-            print(
-                binname,
-                "\t".join(
-                    str(statistics.median(sample_depths))
-                    for sample_depths in all_depths
-                ),
-                sep="\t",
-                file=outfile,
+    contig_depths = None
+    n_cached = 0
+    all_bin_stats = []
+    bins = read_bins(args)
+    for binname, file, contigs in bins:
+        bin_stats = None
+        if args.cache_dir:
+            bin_hash = (
+                hash_file(file, decompress=True)
+                if file
+                else hashlib.sha256("\n".join(sorted(contigs)).encode()).hexdigest()
             )
+            key = hashlib.sha256((depths_hash + bin_hash).encode()).hexdigest()
+            cached_stats = cache_lookup(args.cache_dir, key) or {}
+            if all(len(cached_stats.get(cache_names[stat], [])) == n_samples for stat in stats):
+                bin_stats = {stat: cached_stats[cache_names[stat]] for stat in stats}
+                n_cached += 1
+        if bin_stats is None:
+            if contig_depths is None:
+                contig_depths = read_contig_depths(args.depths)
+            bin_stats = compute_bin_stats(contigs or bin_contigs(file), contig_depths, stats, args.trim_fraction)
+            if args.cache_dir:
+                cached_stats.update({cache_names[stat]: bin_stats[stat] for stat in stats})
+                cache_store(args.cache_dir, key, cached_stats)
+
+        all_bin_stats.append((binname, bin_stats))
+        with open(outfile_name, "a") as outfile:
+            print(binname, "\t".join(bin_stats["median"]), sep="\t", file=outfile)
+
+    if extra_stats and args.stats_format == "long":
+        with open(prefix + "-binStats.tsv", "w") as outfile:
+            print("bin", "sample", "statistic", "value", sep="\t", file=outfile)
+            for binname, bin_stats in all_bin_stats:
+                for stat in extra_stats:
+                    for sample_name, value in zip(sample_names, bin_stats[stat]):
+                        print(binname, sample_name, stat, value, sep="\t", file=outfile)
+    elif extra_stats:
+        for stat in extra_stats:
+            with open(prefix + "-binStats." + stat + ".tsv", "w") as outfile:
+                print("bin", "\t".join(sample_names), sep="\t", file=outfile)
+                for binname, bin_stats in all_bin_stats:
+                    print(binname, "\t".join(bin_stats[stat]), sep="\t", file=outfile)
+
+    if args.cache_dir:
+        cache_evict(args.cache_dir, args.cache_max_entries)
+        print(
+            "Reused cached depths for " + str(n_cached) + " of " + str(len(bins)) + " bins.",
+            file=sys.stderr,
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+
+# USAGE: bowtie2 ... | host_read_ids.py --out1 <prefix>.mapped_1.read_ids.txt --out2 <prefix>.mapped_2.read_ids.txt
+
+import sys
+import argparse
+import heapq
+import tempfile
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-i",
+        "--input",
+        required=False,
+        default="-",
+        metavar="FILE",
+        help="SAM file from bowtie2, '-' to read from stdin (default: -).",
+    )
+    parser.add_argument(
+        "-1", "--out1", required=True, metavar="FILE", help="Output file for sorted, unique read IDs of mapped mate 1."
+    )
+    parser.add_argument(
+        "-2", "--out2", required=True, metavar="FILE", help="Output file for sorted, unique read IDs of mapped mate 2."
+    )
+    parser.add_argument(
+        "-b",
+        "--buffer_size",
+        required=False,
+        type=int,
+        default=2000000,
+        help="Number of read IDs per mate kept in memory before a sorted run is spilled to disk (default: 2000000).",
+    )
+    parser.add_argument(
+        "-t", "--tmp_dir", required=False, default=".", metavar="DIR", help="Directory for sorted runs (default: .)."
+    )
+    return parser.parse_args(args)
+
+
+class ExternalSortedSet:
+    """Collects byte strings and writes them sorted (byte order, as `LC_ALL=C sort`) and deduplicated,
+    spilling sorted runs to disk whenever the in-memory buffer is full."""
+
+    def __init__(self, buffer_size, tmp_dir):
+        self.buffer_size = buffer_size
+        self.tmp_dir = tmp_dir
+        self.buffer = set()
+        self.runs = []
+
+    def add(self, item):
+        self.buffer.add(item)
+        if len(self.buffer) >= self.buffer_size:
+            self.spill()
+
+    def spill(self):
+        run = tempfile.TemporaryFile(dir=self.tmp_dir)
+        run.writelines(item + b"\n" for item in sorted(self.buffer))
+        run.seek(0)
+        self.runs.append(run)
+        self.buffer = set()
+
+    def write(self, path):
+        streams = [iter(run) for run in self.runs]
+        streams.append(item + b"\n" for item in sorted(self.buffer))
+        previous = None
+        with open(path, "wb") as outfile:
+            for line in heapq.merge(*streams):
+                if line != previous:
+                    outfile.write(line)
+                    previous = line
+        for run in self.runs:
+            run.close()
+
+
+def main(args=None):
+    args = parse_args(args)
+
+    mates = {
+        0x40: ExternalSortedSet(args.buffer_size, args.tmp_dir),
+        0x80: ExternalSortedSet(args.buffer_size, args.tmp_dir),
+    }
+    infile = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    for line in infile:
+        if line.startswith(b"@"):
+            continue
+        qname, flag = line.split(b"\t", 2)[:2]
+        flag = int(flag)
+        # same reads bowtie2 writes with --al-conc: primary records of pairs that aligned concordantly
+        if flag & 0x1 and flag & 0x2 and not flag & 0x904 and flag & 0xC0 in mates:
+            mates[flag & 0xC0].add(qname)
+    if infile is not sys.stdin.buffer:
+        infile.close()
+
+    mates[0x40].write(args.out1)
+    mates[0x80].write(args.out2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
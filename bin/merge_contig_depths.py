@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+
+# USAGE: merge_contig_depths.py --depths <sample1-depth.txt.gz> [<sample2-depth.txt.gz> ...] [--existing <depth.txt.gz>] --out <depth.txt.gz>
+
+import sys
+import argparse
+import gzip
+import io
+from itertools import zip_longest
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-d",
+        "--depths",
+        required=True,
+        nargs="+",
+        metavar="FILE",
+        help="(Compressed) contig depth tables from jgi_summarize_bam_contig_depths, one or more samples each: contigName, contigLen, totalAvgDepth, sample_avgDepth, sample_var [, ...].",
+    )
+    parser.add_argument(
+        "-e",
+        "--existing",
+        required=False,
+        metavar="FILE",
+        help="(Compressed) existing merged depth table of the same assembly; its sample columns are kept and the new samples are appended.",
+    )
+    parser.add_argument(
+        "-o",
+        "--out",
+        required=True,
+        metavar="FILE",
+        help="Output depth table in MetaBAT2 layout, gzip compressed: contigName, contigLen, totalAvgDepth, sample1_avgDepth, sample1_var [, ...].",
+    )
+    return parser.parse_args(args)
+
+
+def open_text(file):
+    if file.endswith(".gz"):
+        return gzip.open(file, "rt")
+    return open(file, "rt")
+
+
+def main(args=None):
+    args = parse_args(args)
+
+    files = ([args.existing] if args.existing else []) + args.depths
+    infiles = [open_text(file) for file in files]
+
+    # header: contigName, contigLen, totalAvgDepth, then (avgDepth, var) column pairs of all inputs
+    headers = [infile.readline().rstrip("\n").split("\t") for infile in infiles]
+    sample_columns = [column for header in headers for column in header[3:]]
+    samples = sample_columns[::2]
+    duplicates = sorted(set(sample for sample in samples if samples.count(sample) > 1))
+    if duplicates:
+        sys.exit("Samples present in more than one depth table: " + ", ".join(duplicates))
+
+    # all tables of one assembly list the contigs in the same (BAM header) order, so they can be joined line by line
+    # mtime=0 keeps the gzip header, and with it the file hash, the same when the same tables are merged again
+    with open(args.out, "wb") as raw, io.TextIOWrapper(
+        gzip.GzipFile(filename="", mode="wb", compresslevel=6, fileobj=raw, mtime=0)
+    ) as outfile:
+        print("\t".join(headers[0][:3] + sample_columns), file=outfile)
+        for n_line, rows in enumerate(zip_longest(*infiles), start=2):
+            if None in rows:
+                missing = [file for file, row in zip(files, rows) if row is None]
+                sys.exit("Depth tables have fewer contigs than the others: " + ", ".join(missing))
+            rows = [row.rstrip("\n").split("\t") for row in rows]
+            contig, contig_len = rows[0][0], rows[0][1]
+            if any(row[0] != contig for row in rows):
+                sys.exit("Contig order differs between depth tables at line " + str(n_line) + ": " + contig)
+            values = [value for row in rows for value in row[3:]]
+            total_avg_depth = sum(float(value) for value in values[::2])
+            print(contig, contig_len, "%.4f" % total_avg_depth, "\t".join(values), sep="\t", file=outfile)
+
+    for infile in infiles:
+        infile.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
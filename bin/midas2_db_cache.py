@@ -0,0 +1,338 @@
+#!/usr/bin/env python
+
+# USAGE: midas2_db_cache.py <fetch|store|list|verify|prune> --store <dir> [options]
+#
+# Persistent store of MIDAS2 databases, keyed by database name and version. An entry <store>/<name>-<version>/ holds
+# immutable generations (<generation>/db, manifest.json with the installed species and size and sha256 of every
+# file) and a 'current' symlink to the latest one, which store swaps atomically. A generation is never changed or
+# deleted in place; older ones are removed by prune once they were not used for --min_idle.
+# A fetch builds the database directory of the task as a tree of symlinks to the read-only files of the current
+# generation, so that MIDAS2 writes end up in the task instead of the cache. It is a hit if all requested species
+# are installed; otherwise only the missing species have to be downloaded into the tree, and store publishes the
+# next generation by hardlinking the unchanged files of the previous one and copying and hashing only new files.
+# Tasks running as root can write through the links; fetch and store detect such changes (cache_store.py), fetch
+# then misses and store does not publish a generation built on modified files.
+
+import sys
+import argparse
+import glob
+import json
+import os
+import re
+import time
+import uuid
+
+from cache_store import (
+    MANIFEST,
+    copy_file,
+    failed_files,
+    last_used,
+    parse_duration,
+    remove_entry,
+    remove_idle_entry,
+    tmp_dir,
+    touch,
+)
+
+CURRENT = "current"
+DB = "db"
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_store(subparser):
+        subparser.add_argument("-s", "--store", required=True, metavar="DIR", help="Database store directory.")
+
+    def add_key(subparser):
+        subparser.add_argument("-n", "--name", required=True, type=str, help="MIDAS2 database name, e.g. 'uhgg'.")
+        subparser.add_argument("-v", "--version", required=True, type=str, help="Database version, e.g. the MIDAS2 version.")
+
+    fetch = subparsers.add_parser(
+        "fetch",
+        help="Link a cached database covering all species (exit 0) or missing species (exit 2) into the task, or exit 1 on miss.",
+    )
+    add_store(fetch)
+    add_key(fetch)
+    fetch.add_argument(
+        "--species", required=False, metavar="FILE", help="File with the required species IDs, one per line."
+    )
+    fetch.add_argument("-o", "--out", required=True, metavar="DIR", help="Database directory to create.")
+    fetch.add_argument(
+        "--missing",
+        required=False,
+        metavar="FILE",
+        help="Output file with the required species not in the cached database.",
+    )
+    fetch.add_argument(
+        "--cached_species",
+        required=False,
+        metavar="FILE",
+        help="Output file with the species of the linked database, empty unless exit status is 2.",
+    )
+
+    store = subparsers.add_parser("store", help="Publish a database from the working directory as new generation.")
+    add_store(store)
+    add_key(store)
+    store.add_argument("-d", "--db", required=True, metavar="DIR", help="Database directory to publish.")
+    store.add_argument(
+        "--species",
+        required=False,
+        nargs="*",
+        default=[],
+        metavar="FILE",
+        help="Files with the species IDs installed in the database, one per line.",
+    )
+
+    list_entries = subparsers.add_parser(
+        "list", help="List generations with version, species, size, last use and whether they are current."
+    )
+    add_store(list_entries)
+
+    verify = subparsers.add_parser("verify", help="Check the checksums of all generations.")
+    add_store(verify)
+    verify.add_argument("--remove", action="store_true", help="Remove generations that fail verification.")
+
+    prune = subparsers.add_parser("prune", help="Remove generations that are not current and were not used recently.")
+    add_store(prune)
+    prune.add_argument(
+        "--min_idle",
+        required=False,
+        type=parse_duration,
+        default="2d",
+        help="Keep generations used within this time, e.g. '12h' or '2d', since running tasks link their files (default: 2d).",
+    )
+
+    return parser.parse_args(args)
+
+
+def entry_path(store, name, version):
+    return os.path.join(store, re.sub(r"[^A-Za-z0-9._-]", "_", name + "-" + version))
+
+
+def read_species(files):
+    species = set()
+    for file in files:
+        with open(file) as infile:
+            species.update(line.strip() for line in infile if line.strip())
+    return species
+
+
+def write_species(file, species):
+    with open(file, "w") as outfile:
+        for species_id in sorted(species):
+            print(species_id, file=outfile)
+
+
+def read_manifest(generation):
+    try:
+        with open(os.path.join(generation, MANIFEST)) as infile:
+            return json.load(infile)
+    except (OSError, ValueError):
+        return None
+
+
+def current_generation(entry):
+    try:
+        return os.path.join(entry, os.readlink(os.path.join(entry, CURRENT)))
+    except OSError:
+        return None
+
+
+def set_current(entry, generation):
+    # a new symlink renamed over the old one, fetches see either the previous or the new generation
+    tmp_link = os.path.join(entry, ".current-" + uuid.uuid4().hex)
+    os.symlink(os.path.basename(generation), tmp_link)
+    os.replace(tmp_link, os.path.join(entry, CURRENT))
+
+
+def generations(store):
+    for path in sorted(glob.glob(os.path.join(store, "*", "*", MANIFEST))):
+        generation = os.path.dirname(path)
+        manifest = read_manifest(generation)
+        if manifest and os.path.basename(generation) != CURRENT:
+            yield os.path.dirname(generation), generation, manifest
+
+
+def link_tree(db, out):
+    # real directories with symlinks to the cached files: new files are written into the task, and the
+    # cached files are read-only, so they cannot be changed through the links unless the task runs as root
+    for root, dirs, names in os.walk(db):
+        target = os.path.join(out, os.path.relpath(root, db))
+        os.makedirs(target, exist_ok=True)
+        for name in names:
+            os.symlink(os.path.abspath(os.path.join(root, name)), os.path.join(target, name))
+
+
+def fetch(args):
+    entry = entry_path(args.store, args.name, args.version)
+    generation = current_generation(entry)
+    manifest = read_manifest(generation) if generation else None
+    if args.cached_species:
+        write_species(args.cached_species, [])
+    if not manifest:
+        print("Database cache miss for " + args.name + " " + args.version, file=sys.stderr)
+        return 1
+    failed = failed_files(os.path.join(generation, DB), manifest["files"], checksum=False)
+    if failed:
+        print("Database cache generation " + generation + " is incomplete or modified, e.g. " + failed[0], file=sys.stderr)
+        return 1
+
+    touch(generation)
+    cached = set(manifest["species"])
+    missing = read_species([args.species]) - cached if args.species else set()
+    if args.missing:
+        write_species(args.missing, missing)
+    link_tree(os.path.join(generation, DB), args.out)
+    if not missing:
+        print("Database cache hit for " + args.name + " " + args.version + ": " + generation, file=sys.stderr)
+        return 0
+
+    if args.cached_species:
+        write_species(args.cached_species, cached)
+    print(
+        "Database cache hit for " + args.name + " " + args.version + " without " + str(len(missing)) + " species",
+        file=sys.stderr,
+    )
+    return 2
+
+
+def store(args):
+    entry = entry_path(args.store, args.name, args.version)
+    os.makedirs(entry, exist_ok=True)
+    species = read_species(args.species)
+    previous = current_generation(entry)
+    manifest = read_manifest(previous) if previous else None
+    previous_files = manifest["files"] if manifest else {}
+    modified = set(failed_files(os.path.join(previous, DB), previous_files, checksum=False)) if manifest else set()
+    if manifest and species <= set(manifest["species"]) and not modified:
+        touch(previous)
+        return 0
+
+    tmp_generation = tmp_dir(entry)
+    os.makedirs(os.path.join(tmp_generation, DB))
+    files, n_linked = {}, 0
+    for root, dirs, names in os.walk(args.db, followlinks=True):
+        for name in names:
+            path = os.path.join(root, name)
+            relpath = os.path.relpath(path, args.db)
+            target = os.path.join(tmp_generation, DB, relpath)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            cached = os.path.join(previous, DB, relpath) if relpath in previous_files else None
+            if cached and os.path.realpath(path) == os.path.realpath(cached):
+                if relpath in modified:
+                    # written through a link: the cached file and the task database can no longer be trusted
+                    remove_entry(entry, tmp_generation)
+                    if current_generation(entry) == previous:
+                        os.remove(os.path.join(entry, CURRENT))
+                    print(
+                        "Database cache generation " + previous + " was modified through a link, e.g. " + relpath
+                        + "; nothing stored, the next run rebuilds the database",
+                        file=sys.stderr,
+                    )
+                    return 0
+                # files still linked to the previous generation are unchanged: hardlink them and keep their records
+                try:
+                    os.link(os.path.realpath(cached), target)
+                    files[relpath] = previous_files[relpath]
+                    n_linked += 1
+                    continue
+                except OSError:
+                    pass
+            files[relpath] = copy_file(path, target)
+    manifest = {
+        "name": args.name,
+        "version": args.version,
+        "species": sorted(species),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "files": files,
+    }
+    with open(os.path.join(tmp_generation, MANIFEST), "w") as outfile:
+        json.dump(manifest, outfile, indent=2)
+    touch(tmp_generation)
+
+    # publish the generation under a new name, then point 'current' to it; the previous generation stays intact
+    # for the tasks linking it until prune removes it
+    generation = os.path.join(entry, time.strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:8])
+    os.rename(tmp_generation, generation)
+    set_current(entry, generation)
+    print(
+        "Stored generation "
+        + generation
+        + ": "
+        + str(len(files) - n_linked)
+        + " new files, "
+        + str(n_linked)
+        + " linked from the previous generation",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def entry_size(manifest):
+    return sum(file["size"] for file in manifest["files"].values())
+
+
+def list_store(args):
+    print("name", "version", "generation", "current", "species", "size", "created", "last_used", sep="\t")
+    for entry, generation, manifest in generations(args.store):
+        print(
+            manifest["name"],
+            manifest["version"],
+            os.path.basename(generation),
+            "yes" if generation == current_generation(entry) else "no",
+            len(manifest["species"]),
+            entry_size(manifest),
+            manifest["created"],
+            time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(last_used(generation))),
+            sep="\t",
+        )
+    return 0
+
+
+def verify(args):
+    n_failed = 0
+    for entry, generation, manifest in generations(args.store):
+        failed = failed_files(os.path.join(generation, DB), manifest["files"], checksum=True)
+        print(
+            manifest["name"],
+            manifest["version"],
+            os.path.basename(generation),
+            "FAILED " + ",".join(failed) if failed else "OK",
+            sep="\t",
+        )
+        if failed:
+            n_failed += 1
+            if args.remove:
+                # fetches of a removed current generation miss until the next store
+                if generation == current_generation(entry):
+                    os.remove(os.path.join(entry, CURRENT))
+                remove_entry(args.store, generation)
+    return 1 if n_failed and not args.remove else 0
+
+
+def prune(args):
+    n_removed = 0
+    for entry, generation, manifest in generations(args.store):
+        if generation != current_generation(entry) and remove_idle_entry(args.store, generation, args.min_idle):
+            n_removed += 1
+    print("Removed " + str(n_removed) + " generations.", file=sys.stderr)
+    return 0
+
+
+def main(args=None):
+    args = parse_args(args)
+    if args.command == "fetch":
+        return fetch(args)
+    if args.command == "store":
+        return store(args)
+    if args.command == "list":
+        return list_store(args)
+    if args.command == "verify":
+        return verify(args)
+    return prune(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+
+# USAGE: midas2_pileup_store.py --sample <sample> --pileups <species1.snps.tsv.lz4> [...] --outdir <dir> --summary <summary.tsv>
+#
+# Converts MIDAS2 run_snps per-species pileups (ref_id, ref_pos, ref_allele, depth, count_a, count_c, count_g, count_t)
+# into a columnar store partitioned by sample and species: <outdir>/species=<species_id>/part-0.parquet, with
+# dictionary-encoded contig and allele columns and uint32 positions and counts. Requires pyarrow.
+# Pileups are parsed and written in chunks, so memory does not scale with the size of a pileup.
+
+import sys
+import argparse
+import os
+import subprocess
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+SUFFIX = ".snps.tsv.lz4"
+COUNT_COLUMNS = ["ref_pos", "depth", "count_a", "count_c", "count_g", "count_t"]
+DTYPES = dict({"ref_id": "category", "ref_allele": "category"}, **{column: np.uint32 for column in COUNT_COLUMNS})
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-s", "--sample", required=True, type=str, help="Sample name.")
+    parser.add_argument(
+        "-p",
+        "--pileups",
+        required=True,
+        nargs="+",
+        metavar="FILE",
+        help="Per-species pileups from MIDAS2 run_snps, named <species_id>" + SUFFIX + ".",
+    )
+    parser.add_argument(
+        "-o", "--outdir", required=True, metavar="DIR", help="Output directory, one species=<species_id> partition each."
+    )
+    parser.add_argument(
+        "-t",
+        "--summary",
+        required=True,
+        metavar="FILE",
+        help="Output per-species summary TSV: sample_name, species_id, pileup_sites, pileup_covered_sites, pileup_total_depth, pileup_mean_depth, pileup_max_depth.",
+    )
+    parser.add_argument(
+        "-c",
+        "--chunk_size",
+        required=False,
+        type=int,
+        default=1000000,
+        help="Number of sites parsed and written per chunk (Parquet row group) (default: 1000000).",
+    )
+    return parser.parse_args(args)
+
+
+def read_chunks(file, chunk_size):
+    # decompress with the lz4 command line tool MIDAS2 itself depends on
+    lz4 = subprocess.Popen(["lz4", "-dc", file], stdout=subprocess.PIPE)
+    try:
+        for chunk in pd.read_csv(lz4.stdout, sep="\t", dtype=DTYPES, chunksize=chunk_size):
+            yield chunk
+    finally:
+        lz4.stdout.close()
+        if lz4.wait() != 0:
+            sys.exit("Failed to decompress " + file)
+
+
+def write_parquet(chunks, path):
+    writer = None
+    for chunk in chunks:
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        # categories differ between chunks, a uniform string dictionary type keeps the row groups compatible
+        table = table.cast(
+            pa.schema(
+                [
+                    pa.field(field.name, pa.dictionary(pa.int32(), pa.string()))
+                    if pa.types.is_dictionary(field.type)
+                    else field
+                    for field in table.schema
+                ]
+            )
+        )
+        if writer is None:
+            writer = pq.ParquetWriter(path, table.schema, compression="zstd")
+        writer.write_table(table)
+        yield chunk
+    if writer is not None:
+        writer.close()
+
+
+def main(args=None):
+    args = parse_args(args)
+    # fail instead of silently writing another format, downstream readers expect Parquet
+    if pa is None:
+        sys.exit("midas2_pileup_store.py requires pyarrow, which is not installed.")
+
+    with open(args.summary, "w") as summary:
+        print(
+            "sample_name",
+            "species_id",
+            "pileup_sites",
+            "pileup_covered_sites",
+            "pileup_total_depth",
+            "pileup_mean_depth",
+            "pileup_max_depth",
+            sep="\t",
+            file=summary,
+        )
+        for file in sorted(args.pileups):
+            species = os.path.basename(file)
+            species = species[: -len(SUFFIX)] if species.endswith(SUFFIX) else species
+            partition = os.path.join(args.outdir, "species=" + species)
+            os.makedirs(partition, exist_ok=True)
+
+            # the summary is accumulated while the chunks pass through to the writer
+            n_sites, n_covered, total_depth, max_depth = 0, 0, 0, 0
+            for chunk in write_parquet(read_chunks(file, args.chunk_size), os.path.join(partition, "part-0.parquet")):
+                depth = chunk["depth"].to_numpy()
+                n_sites += depth.size
+                n_covered += int(np.count_nonzero(depth))
+                total_depth += int(depth.sum(dtype=np.uint64))
+                max_depth = max(max_depth, int(depth.max()) if depth.size else 0)
+
+            mean_depth = total_depth / n_sites if n_sites else 0.0
+            print(
+                args.sample, species, n_sites, n_covered, total_depth, "%.4f" % mean_depth, max_depth, sep="\t", file=summary
+            )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+
+import sys
+import argparse
+import json
+import numpy as np
+import pandas as pd
+from scipy.cluster import hierarchy
+
+# the TSV input is transformed with the same functions as the .npz, so that both give the same heatmap
+import transform_mag_depths
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser()
+    inputs = parser.add_mutually_exclusive_group(required=True)
+    inputs.add_argument(
+        "-d",
+        "--bin_depths",
+        metavar="FILE",
+        help="Bin depths file in TSV format (for one assembly and binning method): bin, sample1_depth, sample2_depth, ....",
+    )
+    inputs.add_argument(
+        "-t",
+        "--transformed",
+        metavar="FILE",
+        help="Precomputed transforms from transform_mag_depths.py (.npz) instead of --bin_depths; log10 depths, relative abundances and clusterings are loaded, not recomputed. Both inputs give the same heatmap.",
+    )
+    parser.add_argument(
+        "-o",
+        "--out",
+        required=True,
+        metavar="FILE",
+        type=str,
+        help="Output MultiQC custom content file (*_mqc.json).",
+    )
+    parser.add_argument(
+        "--id", required=False, type=str, default="bin_depth_heatmap", help="MultiQC section id."
+    )
+    parser.add_argument(
+        "--top_bins",
+        required=False,
+        type=int,
+        default=50,
+        help="Number of bins shown individually, all other bins are aggregated into 'other' rows (default: 50).",
+    )
+    parser.add_argument(
+        "--select_by",
+        required=False,
+        choices=["prevalence", "variance"],
+        default="prevalence",
+        help="Select the top bins by number of samples with depth > 0 or by variance of log10 depths (default: prevalence).",
+    )
+    parser.add_argument(
+        "--other_groups",
+        required=False,
+        type=int,
+        default=5,
+        help="Maximum number of 'other' rows, remaining bins are grouped by cutting the bin clustering (default: 5).",
+    )
+    parser.add_argument(
+        "--max_samples",
+        required=False,
+        type=int,
+        default=100,
+        help="Maximum number of columns, above this similar samples are averaged into one column (default: 100).",
+    )
+    parser.add_argument(
+        "--log_offset",
+        required=False,
+        type=float,
+        default=1e-6,
+        help="Value added to depths before the log10 transform (default: 1e-6).",
+    )
+    return parser.parse_args(args)
+
+
+def leaves_order(n, link):
+    return np.arange(n) if link is None else hierarchy.leaves_list(link)
+
+
+def cluster_labels(n, link, max_clusters):
+    if link is None or n <= max_clusters:
+        return np.arange(n)
+    return hierarchy.fcluster(link, t=max_clusters, criterion="maxclust")
+
+
+def main(args=None):
+    args = parse_args(args)
+
+    if args.transformed:
+        with np.load(args.transformed, allow_pickle=False) as transformed:
+            bins = transformed["bins"]
+            samples = transformed["samples"]
+            log_depths = transformed["log10"].astype(np.float64)
+            present = transformed["rel_abundance"] > 0
+            log_offset = float(transformed["log_offset"])
+            clr_link = transformed["clr_linkage"]
+            sample_link = transformed["sample_linkage"]
+    else:
+        df = pd.read_csv(args.bin_depths, sep="\t", index_col=0)
+        raw_depths = df.to_numpy(dtype=np.float32)
+        log_offset = args.log_offset
+        log10_values = transform_mag_depths.log10(raw_depths, log_offset)
+        log_depths = log10_values.astype(np.float64)
+        present = transform_mag_depths.relative_abundance(raw_depths) > 0
+        bins = df.index.to_numpy(dtype=str)
+        samples = df.columns.to_numpy(dtype=str)
+        clr_link = transform_mag_depths.row_linkage(transform_mag_depths.clr(raw_depths)[0])
+        sample_link = transform_mag_depths.row_linkage(log10_values.T)
+    # bins are ordered by the CLR clustering and samples by the log10 clustering in both modes
+    bin_link = clr_link if len(clr_link) else None
+    sample_link = sample_link if len(sample_link) else None
+    # linear depths are only needed to average the aggregated rows and columns
+    depths = np.maximum(np.power(10.0, log_depths) - log_offset, 0.0)
+
+    # select top bins, ties in prevalence are broken by mean depth; keep them in clustering order
+    if args.select_by == "prevalence":
+        ranking = np.lexsort((-log_depths.mean(axis=1), -present.sum(axis=1)))
+    else:
+        ranking = np.argsort(-log_depths.var(axis=1), kind="stable")
+    top = np.zeros(len(bins), dtype=bool)
+    top[ranking[: args.top_bins]] = True
+    order = leaves_order(len(bins), bin_link)
+    row_names = [bins[i] for i in order if top[i]]
+    rows = [depths[i] for i in order if top[i]]
+
+    # aggregate all other bins into at most --other_groups rows, grouped by the bin clustering
+    if not top.all():
+        labels = cluster_labels(len(bins), bin_link, args.other_groups)
+        n_other = 0
+        for label in pd.unique(labels[order]):
+            members = ~top & (labels == label)
+            if members.any():
+                n_other += 1
+                row_names.append("other " + str(n_other) + " (" + str(int(members.sum())) + " bins)")
+                rows.append(depths[members].mean(axis=0))
+    row_depths = np.vstack(rows)
+
+    # order samples by their clustering over all bins, average similar samples if there are too many
+    sample_order = leaves_order(len(samples), sample_link)
+    sample_labels = cluster_labels(len(samples), sample_link, args.max_samples)
+    col_names = []
+    columns = []
+    for label in pd.unique(sample_labels[sample_order]):
+        members = [i for i in sample_order if sample_labels[i] == label]
+        col_names.append(samples[members[0]] + (" (+" + str(len(members) - 1) + ")" if len(members) > 1 else ""))
+        columns.append(row_depths[:, members].mean(axis=1))
+    matrix = np.log10(np.column_stack(columns) + log_offset)
+
+    heatmap = {
+        "id": args.id,
+        "plot_type": "heatmap",
+        "pconfig": {
+            "id": args.id,
+            "xlab": "Samples",
+            "ylab": "Bins",
+            "square": False,
+        },
+        "xcats": col_names,
+        "ycats": row_names,
+        "data": np.round(matrix, 3).tolist(),
+    }
+    with open(args.out, "w") as outfile:
+        json.dump(heatmap, outfile)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
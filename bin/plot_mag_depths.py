@@ -32,6 +32,13 @@ def parse_args(args=None):
     parser.add_argument(
         "-o", "--out", required=True, metavar="FILE", type=str, help="Output file."
     )
+    parser.add_argument(
+        "-t",
+        "--transformed",
+        required=False,
+        metavar="FILE",
+        help="Precomputed transforms from transform_mag_depths.py (.npz); if given, CLR values and bin clustering are loaded instead of recomputed.",
+    )
     return parser.parse_args(args)
 
 
@@ -39,18 +46,25 @@ def main(args=None):
     args = parse_args(args)
 
     # load data
-    df = pd.read_csv(args.bin_depths, sep="\t", index_col=0)
     groups = pd.read_csv(args.groups, sep="\t", index_col=0, names=["sample", "group"])
+    linkage = None
+    if args.transformed:
+        with np.load(args.transformed, allow_pickle=False) as transformed:
+            df = pd.DataFrame(transformed["clr"], index=transformed["bins"], columns=transformed["samples"])
+            if len(transformed["clr_linkage"]):
+                linkage = transformed["clr_linkage"]
+    else:
+        df = pd.read_csv(args.bin_depths, sep="\t", index_col=0)
 
-    # add pseudo-abundances (sample-wise? dependent on lib-size)
-    pseudo_cov = 0.1 * df[df > 0].min().min()
-    df.replace(0, pseudo_cov, inplace=True)
-    # compute centered log-ratios
-    # divide df by sample-wise geometric means
-    gmeans = stats.gmean(df, axis=0)  # apply on axis=0: 'index'
-    df = np.log(
-        df.div(gmeans, axis="columns")
-    )  # divide column-wise (axis=1|'columns'), take natural logorithm
+        # add pseudo-abundances (sample-wise? dependent on lib-size)
+        pseudo_cov = 0.1 * df[df > 0].min().min()
+        df.replace(0, pseudo_cov, inplace=True)
+        # compute centered log-ratios
+        # divide df by sample-wise geometric means
+        gmeans = stats.gmean(df, axis=0)  # apply on axis=0: 'index'
+        df = np.log(
+            df.div(gmeans, axis="columns")
+        )  # divide column-wise (axis=1|'columns'), take natural logorithm
     df.index.name = "Bins"
     df.columns.name = "Samples"
 
@@ -70,6 +84,7 @@ def main(args=None):
     sns.clustermap(
         df,
         row_cluster=True,
+        row_linkage=linkage,
         yticklabels=bin_labels,
         cmap="vlag",
         center=0,
@@ -29,20 +29,34 @@ def parse_args(args=None):
     parser.add_argument(
         "-o", "--out", required=True, metavar="FILE", type=str, help="Output file."
     )
+    parser.add_argument(
+        "-t",
+        "--transformed",
+        required=False,
+        metavar="FILE",
+        help="Precomputed transforms from transform_mag_depths.py (.npz); if given, log10 values and bin order are loaded instead of recomputed.",
+    )
     return parser.parse_args(args)
 def main(args):
     # Load data
-    df = pd.read_csv(args.bin_depths, sep="\t", index_col=0)
     groups = pd.read_csv(args.groups, sep="\t", index_col=0, names=["sample", "group"])
-    # Count non-zero abundances for each bin
-    non_zero_counts = (df > 0).sum(axis=1)
-        
-    # Sort bins by non-zero abundance count in descending order
-    df_sorted = df.loc[non_zero_counts.sort_values(ascending=False).index]
-    
-    # Log transform the data, adding a small value to handle zeros
-    small_value = 1e-6  # can be changed for data scale
-    df_log = np.log10(df_sorted + small_value)
+    if args.transformed:
+        with np.load(args.transformed, allow_pickle=False) as transformed:
+            order = transformed["nonzero_order"]
+            df_log = pd.DataFrame(
+                transformed["log10"][order].astype(np.float64), index=transformed["bins"][order], columns=transformed["samples"]
+            )
+    else:
+        df = pd.read_csv(args.bin_depths, sep="\t", index_col=0)
+        # Count non-zero abundances for each bin
+        non_zero_counts = (df > 0).sum(axis=1)
+
+        # Sort bins by non-zero abundance count in descending order
+        df_sorted = df.loc[non_zero_counts.sort_values(ascending=False).index]
+
+        # Log transform the data, adding a small value to handle zeros
+        small_value = 1e-6  # can be changed for data scale
+        df_log = np.log10(df_sorted + small_value)
     # Prepare colors for group information
     color_map = dict(zip(groups["group"].unique(), sns.color_palette(n_colors=len(groups["group"].unique()))))
    
@@ -0,0 +1,45 @@
+#!/usr/bin/env bash
+
+# USAGE: <SAM on stdin> | restrict_sam_contigs.sh <contig_lengths.tsv> <counts.tsv> <sample> > <SAM on stdout>
+#
+# Restricts SAM output of a mapping against the unfiltered assembly to the contigs kept by filter_assembly.py
+# (first column of <contig_lengths.tsv>): @SQ lines and alignments of dropped contigs are removed, mate fields that
+# point to a dropped contig are cleared. Reads aligned to dropped contigs are still counted, so alignment rates are
+# unchanged, and the count is written to <counts.tsv>: sample, reads_on_dropped_contigs.
+
+set -euo pipefail
+
+awk -v kept="$1" -v counts="$2" -v sample="$3" '
+    BEGIN {
+        FS = OFS = "\t"
+        while ((getline line < kept) > 0) {
+            split(line, fields, "\t")
+            keep[fields[1]] = 1
+        }
+        close(kept)
+        n_dropped = 0
+    }
+    /^@SQ/ {
+        for (i = 2; i <= NF; i++) {
+            if (substr($i, 1, 3) == "SN:" && !(substr($i, 4) in keep)) next
+        }
+        print
+        next
+    }
+    /^@/ { print; next }
+    {
+        # unmapped reads are placed at the contig of their mate, they stay in the output as plain unmapped reads
+        unmapped = int($2 / 4) % 2
+        if ($3 != "*" && !($3 in keep)) {
+            if (!unmapped) { n_dropped++; next }
+            $3 = "*"; $4 = 0; $7 = "*"; $8 = 0
+        }
+        mate = ($7 == "=") ? $3 : $7
+        if (mate != "*" && !(mate in keep)) { $7 = "*"; $8 = 0 }
+        print
+    }
+    END {
+        print "sample", "reads_on_dropped_contigs" > counts
+        print sample, n_dropped > counts
+    }
+'
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+
+# USAGE: select_midas2_species.py --profiles <sample1.species_profile.tsv> [...] --mode <per_sample|shared> [thresholds]
+#
+# Cohort-level selection of the species MIDAS2 run_snps genotypes. A species passes in a sample if it meets the
+# coverage and read-count thresholds; it is selected if it passes in at least --min_prevalence of the samples.
+# Writes <outdir>/<sample>.species_list.txt (one species_id per line, possibly empty) for every sample and a
+# summary of the species and marker reads that run_snps does not have to pile up.
+
+import sys
+import argparse
+import csv
+import math
+import os
+
+SUFFIX = ".species_profile.tsv"
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-p",
+        "--profiles",
+        required=True,
+        nargs="+",
+        metavar="FILE",
+        help="species_profile.tsv files from MIDAS2 run_species, named <sample>" + SUFFIX + ".",
+    )
+    parser.add_argument(
+        "-m",
+        "--mode",
+        required=False,
+        default="per_sample",
+        choices=["per_sample", "shared"],
+        help="per_sample: species passing in the sample and prevalent in the cohort; shared: the same panel of all prevalent species for every sample (default: per_sample).",
+    )
+    parser.add_argument(
+        "-c",
+        "--min_median_marker_coverage",
+        required=False,
+        type=float,
+        default=2.0,
+        help="Minimum median_marker_coverage of a species in a sample (default: 2).",
+    )
+    parser.add_argument(
+        "-u",
+        "--min_unique_fraction_covered",
+        required=False,
+        type=float,
+        default=0.5,
+        help="Minimum unique_fraction_covered of a species in a sample (default: 0.5).",
+    )
+    parser.add_argument(
+        "-r",
+        "--min_marker_read_counts",
+        required=False,
+        type=int,
+        default=0,
+        help="Minimum marker_read_counts of a species in a sample (default: 0).",
+    )
+    parser.add_argument(
+        "-f",
+        "--min_prevalence",
+        required=False,
+        type=float,
+        default=0.0,
+        help="Minimum fraction of samples in which a species has to pass the thresholds (default: 0, i.e. one sample).",
+    )
+    parser.add_argument(
+        "-o", "--outdir", required=False, default="species_lists", metavar="DIR", help="Output directory for species lists."
+    )
+    parser.add_argument(
+        "-s",
+        "--summary",
+        required=False,
+        default="midas2_species_selection.tsv",
+        metavar="FILE",
+        help="Output summary TSV (default: midas2_species_selection.tsv).",
+    )
+    return parser.parse_args(args)
+
+
+def read_profile(file, args):
+    # stream one sample's profile: all species with their marker reads, and the species passing the thresholds
+    marker_reads, passing = {}, set()
+    with open(file) as infile:
+        for row in csv.DictReader(infile, delimiter="\t"):
+            species = row["species_id"]
+            marker_reads[species] = int(float(row["marker_read_counts"]))
+            if (
+                float(row["median_marker_coverage"]) >= args.min_median_marker_coverage
+                and float(row["unique_fraction_covered"]) >= args.min_unique_fraction_covered
+                and marker_reads[species] >= args.min_marker_read_counts
+            ):
+                passing.add(species)
+    return marker_reads, passing
+
+
+def main(args=None):
+    args = parse_args(args)
+
+    samples = {}
+    for file in args.profiles:
+        sample = os.path.basename(file)
+        sample = sample[: -len(SUFFIX)] if sample.endswith(SUFFIX) else sample
+        if sample in samples:
+            sys.exit("Sample '" + sample + "' has more than one species profile.")
+        samples[sample] = read_profile(file, args)
+
+    prevalence = {}
+    for marker_reads, passing in samples.values():
+        for species in passing:
+            prevalence[species] = prevalence.get(species, 0) + 1
+    min_samples = max(1, math.ceil(args.min_prevalence * len(samples) - 1e-9))
+    panel = set(species for species, n_samples in prevalence.items() if n_samples >= min_samples)
+
+    os.makedirs(args.outdir, exist_ok=True)
+    totals = [0, 0, 0, 0, 0, 0]
+    with open(args.summary, "w") as summary:
+        print(
+            "sample",
+            "species_detected",
+            "species_selected",
+            "species_skipped",
+            "marker_reads_detected",
+            "marker_reads_selected",
+            "fraction_marker_reads_skipped",
+            sep="\t",
+            file=summary,
+        )
+
+        def print_row(sample, n_detected, n_selected, n_skipped, reads_detected, reads_selected, reads_skipped):
+            skipped = reads_skipped / reads_detected if reads_detected else 0.0
+            print(
+                sample,
+                n_detected,
+                n_selected,
+                n_skipped,
+                reads_detected,
+                reads_selected,
+                "%.4f" % skipped,
+                sep="\t",
+                file=summary,
+            )
+
+        for sample, (marker_reads, passing) in samples.items():
+            selected = sorted(panel if args.mode == "shared" else passing & panel)
+            with open(os.path.join(args.outdir, sample + ".species_list.txt"), "w") as outfile:
+                for species in selected:
+                    print(species, file=outfile)
+            # species detected by run_species are those with marker reads, they would all be piled up without selection;
+            # selected species may include species the sample did not detect itself, so skipped ones are a set difference
+            detected = set(species for species, reads in marker_reads.items() if reads > 0)
+            skipped = detected - set(selected)
+            row = [
+                len(detected),
+                len(selected),
+                len(skipped),
+                sum(marker_reads[species] for species in detected),
+                sum(marker_reads.get(species, 0) for species in selected),
+                sum(marker_reads[species] for species in skipped),
+            ]
+            print_row(sample, *row)
+            totals = [total + value for total, value in zip(totals, row)]
+        print_row("total", *totals)
+
+    print(
+        "Selected " + str(len(panel)) + " species present in at least " + str(min_samples) + " of " + str(len(samples)) + " samples.",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+from scipy.cluster import hierarchy
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-d",
+        "--bin_depths",
+        required=True,
+        metavar="FILE",
+        help="Bin depths file in TSV format (for one assembly and binning method): bin, sample1_depth, sample2_depth, ....",
+    )
+    parser.add_argument(
+        "-o",
+        "--out",
+        required=True,
+        metavar="FILE",
+        type=str,
+        help="Output file (.npz) containing the transformed bin depth matrices and bin orderings.",
+    )
+    parser.add_argument(
+        "--log_offset",
+        required=False,
+        type=float,
+        default=1e-6,
+        help="Value added to depths before the log10 transform (default: 1e-6).",
+    )
+    return parser.parse_args(args)
+
+
+def clr(depths):
+    # add pseudo-abundances (sample-wise? dependent on lib-size)
+    positive = depths[depths > 0]
+    pseudo_cov = 0.1 * positive.min() if positive.size else 1.0
+    values = depths.copy()
+    values[values == 0] = pseudo_cov
+    # centered log-ratios: log(x / gmean(x)) == log(x) - mean(log(x)), sample-wise (column-wise)
+    np.log(values, out=values)
+    values -= values.mean(axis=0, dtype=np.float64).astype(np.float32)
+    return values, pseudo_cov
+
+
+def log10(depths, offset):
+    values = depths + np.float32(offset)
+    np.log10(values, out=values)
+    return values
+
+
+def relative_abundance(depths):
+    totals = depths.sum(axis=0)
+    values = depths.copy()
+    np.divide(values, totals, out=values, where=totals > 0)
+    values[:, totals == 0] = 0
+    return values
+
+
+def nonzero_order(df):
+    # sort bins by non-zero abundance count in descending order
+    non_zero_counts = (df > 0).sum(axis=1).reset_index(drop=True)
+    return non_zero_counts.sort_values(ascending=False).index.to_numpy(dtype=np.int32)
+
+
+def row_linkage(values):
+    # same method and metric as the seaborn clustermap default
+    if values.shape[0] < 2:
+        return np.empty((0, 4))
+    return hierarchy.linkage(values.astype(np.float64), method="average", metric="euclidean")
+
+
+def main(args=None):
+    args = parse_args(args)
+
+    df = pd.read_csv(args.bin_depths, sep="\t", index_col=0)
+    depths = df.to_numpy(dtype=np.float32)
+
+    clr_values, pseudo_cov = clr(depths)
+    log10_values = log10(depths, args.log_offset)
+    np.savez_compressed(
+        args.out,
+        bins=df.index.to_numpy(dtype=str),
+        samples=df.columns.to_numpy(dtype=str),
+        clr=clr_values,
+        clr_linkage=row_linkage(clr_values),
+        pseudo_count=np.float32(pseudo_cov),
+        log10=log10_values,
+        log_offset=np.float64(args.log_offset),
+        sample_linkage=row_linkage(log10_values.T),
+        rel_abundance=relative_abundance(depths),
+        nonzero_order=nonzero_order(df),
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
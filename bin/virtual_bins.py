@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+
+# USAGE: virtual_bins.py <lists|materialise> [options]
+#
+# Virtual bins are contig ID lists (contig2bin TSV: contig, bin) on top of the assembly.
+#   lists        write a contig2bin TSV from bin FASTA files, for consumers that only need contig IDs
+#   materialise  write bin FASTA files from a contig2bin TSV in one streaming pass over the assembly, no copy of
+#                the assembly is written
+
+import sys
+import argparse
+import gzip
+import os
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser()
+    # no required=True for subparsers, which is not available before Python 3.7
+    subparsers = parser.add_subparsers(dest="command")
+
+    lists = subparsers.add_parser("lists", help="Write contig2bin TSV from bin FASTA files.")
+    lists.add_argument("-b", "--bins", required=True, nargs="+", metavar="FILE", help="(Compressed) bin FASTA files.")
+    lists.add_argument(
+        "-e",
+        "--extension",
+        required=False,
+        default="",
+        help="Extension removed from bin file names to get the bin ID, e.g. '.fa' (default: keep file name).",
+    )
+    lists.add_argument("-o", "--out", required=True, metavar="FILE", help="Output contig2bin TSV.")
+
+    materialise = subparsers.add_parser("materialise", help="Write bin FASTA files from a contig2bin TSV.")
+    materialise.add_argument(
+        "-a", "--assembly", required=True, metavar="FILE", help="(Compressed) assembly FASTA."
+    )
+    materialise.add_argument(
+        "-c", "--contig2bin", required=True, metavar="FILE", help="TSV without header: contig, bin."
+    )
+    materialise.add_argument(
+        "-b", "--bins", required=False, nargs="+", help="Only write these bins (default: all bins)."
+    )
+    materialise.add_argument(
+        "-u",
+        "--unbinned",
+        required=False,
+        metavar="NAME",
+        help="Also write all contigs not assigned to any bin into a bin of this name.",
+    )
+    materialise.add_argument(
+        "-e", "--extension", required=False, default=".fa", help="Extension of the written bin files (default: .fa)."
+    )
+    materialise.add_argument("-o", "--outdir", required=False, default=".", metavar="DIR", help="Output directory.")
+
+    args = parser.parse_args(args)
+    if args.command is None:
+        parser.error("a command is required: lists or materialise")
+    return args
+
+
+def open_text(file):
+    if file.endswith(".gz"):
+        return gzip.open(file, "rt")
+    return open(file, "rt")
+
+
+def read_contig2bin(file):
+    # bin -> list of contigs, in order of the contig2bin file
+    bins = {}
+    with open(file) as infile:
+        for line in infile:
+            if line.strip():
+                contig, bin_id = line.rstrip("\n").split("\t")[:2]
+                bins.setdefault(bin_id, []).append(contig)
+    return bins
+
+
+def read_records(infile):
+    # stream records without holding more than one contig in memory
+    name, lines = None, []
+    for line in infile:
+        if line.startswith(">"):
+            if name is not None:
+                yield name, "".join(lines)
+            name, lines = line[1:].split(None, 1)[0], [line]
+        elif name is not None:
+            lines.append(line)
+    if name is not None:
+        yield name, "".join(lines)
+
+
+def lists(args):
+    with open(args.out, "w") as outfile:
+        for file in args.bins:
+            bin_id = os.path.basename(file)
+            if bin_id.endswith(".gz"):
+                bin_id = bin_id[:-3]
+            if args.extension and bin_id.endswith(args.extension):
+                bin_id = bin_id[: -len(args.extension)]
+            with open_text(file) as infile:
+                for line in infile:
+                    if line.startswith(">"):
+                        print(line[1:].split(None, 1)[0], bin_id, sep="\t", file=outfile)
+    return 0
+
+
+def materialise(args):
+    bins = read_contig2bin(args.contig2bin)
+    if args.bins:
+        missing = [bin_id for bin_id in args.bins if bin_id not in bins]
+        if missing:
+            sys.exit("Bins not found in " + args.contig2bin + ": " + ", ".join(missing))
+    contig2bin = {contig: bin_id for bin_id, contigs in bins.items() for contig in contigs}
+    selected = set(args.bins) if args.bins else set(bins)
+
+    if not os.path.isdir(args.outdir):
+        os.makedirs(args.outdir)
+    # bin files are opened when their first contig is read, so bins without sequence are never written
+    outfiles = {}
+    found = set()
+    try:
+        with open_text(args.assembly) as infile:
+            for name, record in read_records(infile):
+                bin_id = contig2bin.get(name, args.unbinned)
+                if name in contig2bin:
+                    found.add(name)
+                elif bin_id is None:
+                    continue
+                if bin_id != args.unbinned and bin_id not in selected:
+                    continue
+                if bin_id not in outfiles:
+                    outfiles[bin_id] = open(os.path.join(args.outdir, bin_id + args.extension), "w")
+                outfiles[bin_id].write(record)
+    finally:
+        for outfile in outfiles.values():
+            outfile.close()
+    missing = sorted(set(contig2bin) - found)
+    if missing:
+        sys.exit("Contigs not found in " + args.assembly + ": " + ", ".join(missing[:10]))
+    return 0
+
+
+def main(args=None):
+    args = parse_args(args)
+    if args.command == "lists":
+        return lists(args)
+    return materialise(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -24,17 +24,21 @@ process BOWTIE2_ALIGNASSEMBLY {
         'biocontainers/mulled-v2-ac74a7f02cebcfcc07d8e8d1d750af9c83b4d45a:577a697be67b5ae9b16f637fd723b8263a3898b3-0' }"
 
     input:
-    tuple val(assembly_meta), path(assembly), path(index), val(reads_meta), path(reads)
+    tuple val(assembly_meta), path(assembly), path(index), path(contig_lengths), val(reads_meta), path(reads)
 
     output:
     tuple val(assembly_meta), path(assembly), path("${assembly_meta.assembler}-${assembly_meta.id}-${reads_meta.id}.bam"), path("${assembly_meta.assembler}-${assembly_meta.id}-${reads_meta.id}.bam.bai"), emit: mappings
     tuple val(assembly_meta), val(reads_meta), path("*.bowtie2.log")                                                                                                                                      , emit: log
+    tuple val(assembly_meta), val(reads_meta), path("*.dropped_contigs.tsv")                                                                                                                        , optional:true, emit: dropped
     path "versions.yml"                                                                                                                                                                                   , emit: versions
 
     script:
     def args = task.ext.args ?: ''
     def name = "${assembly_meta.assembler}-${assembly_meta.id}-${reads_meta.id}"
     def input = "-1 \"${reads[0]}\" -2 \"${reads[1]}\""
+    // with the short-contig pre-filter, reads are mapped against the unfiltered assembly and only the BAM is
+    // restricted to the kept contigs, reads aligned to dropped contigs are counted
+    def restrict = contig_lengths ? "restrict_sam_contigs.sh ${contig_lengths} ${name}.dropped_contigs.tsv ${reads_meta.id} | " : ''
     """
     INDEX=`find -L ./ -name "*.rev.1.bt2l" -o -name "*.rev.1.bt2" | sed 's/.rev.1.bt2l//' | sed 's/.rev.1.bt2//'`
     bowtie2 \\
@@ -42,7 +46,7 @@ process BOWTIE2_ALIGNASSEMBLY {
         -x \$INDEX \\
         $input \\
         2> "${name}.bowtie2.log" | \
-        samtools view -@ "${task.cpus}" -bS | \
+        ${restrict}samtools view -@ "${task.cpus}" -bS | \
         samtools sort -@ "${task.cpus}" -o "${name}.bam"
     samtools index "${name}.bam"
 
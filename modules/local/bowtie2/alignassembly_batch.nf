@@ -0,0 +1,52 @@
+process BOWTIE2_ALIGNASSEMBLY_BATCH {
+    tag "${assembly_meta.assembler}-${assembly_meta.id}-${reads_metas.size()}_samples"
+
+    conda "bioconda::bowtie2=2.4.2 bioconda::samtools=1.11 conda-forge::pigz=2.3.4"
+    container "${ workflow.containerEngine == 'singularity' && !task.ext.singularity_pull_docker_container ?
+        'https://depot.galaxyproject.org/singularity/mulled-v2-ac74a7f02cebcfcc07d8e8d1d750af9c83b4d45a:577a697be67b5ae9b16f637fd723b8263a3898b3-0' :
+        'biocontainers/mulled-v2-ac74a7f02cebcfcc07d8e8d1d750af9c83b4d45a:577a697be67b5ae9b16f637fd723b8263a3898b3-0' }"
+
+    input:
+    tuple val(assembly_meta), path(assembly), path(index), path(contig_lengths), val(reads_metas), path(reads)
+
+    output:
+    tuple val(assembly_meta), path(assembly), path("${assembly_meta.assembler}-${assembly_meta.id}-*.bam"), path("${assembly_meta.assembler}-${assembly_meta.id}-*.bam.bai"), emit: mappings
+    tuple val(assembly_meta), val(reads_metas), path("*.bowtie2.log")                                                                                                     , emit: log
+    tuple val(assembly_meta), val(reads_metas), path("*.dropped_contigs.tsv")                                                                                             , optional:true, emit: dropped
+    path "versions.yml"                                                                                                                                                   , emit: versions
+
+    script:
+    def args = task.ext.args ?: ''
+    // one bowtie2 run per sample against the same memory-mapped index (--mm), so the index is read from disk once per
+    // task; reads are expected as [ sample1_R1, sample1_R2, sample2_R1, sample2_R2, ... ] in the order of reads_metas;
+    // with the short-contig pre-filter the BAMs are restricted to the kept contigs as in BOWTIE2_ALIGNASSEMBLY
+    def mappings = reads_metas.withIndex().collect { reads_meta, i ->
+        def name = "${assembly_meta.assembler}-${assembly_meta.id}-${reads_meta.id}"
+        def log_name = reads_meta.id == assembly_meta.id ? "${assembly_meta.assembler}-${assembly_meta.id}" : name
+        def restrict = contig_lengths ? "restrict_sam_contigs.sh ${contig_lengths} ${name}.dropped_contigs.tsv ${reads_meta.id} | " : ''
+        """
+        bowtie2 \\
+            -p "${task.cpus}" \\
+            --mm \\
+            -x \$INDEX \\
+            -1 "${reads[2 * i]}" -2 "${reads[2 * i + 1]}" \\
+            --rg-id "${reads_meta.id}" --rg "SM:${reads_meta.id}" \\
+            $args \\
+            2> "${log_name}.bowtie2.log" | \\
+            ${restrict}samtools view -@ "${task.cpus}" -bS | \\
+            samtools sort -@ "${task.cpus}" -o "${name}.bam"
+        samtools index "${name}.bam"
+        """
+    }.join('\n')
+    """
+    INDEX=`find -L ./ -name "*.rev.1.bt2l" -o -name "*.rev.1.bt2" | sed 's/.rev.1.bt2l//' | sed 's/.rev.1.bt2//'`
+    ${mappings}
+
+    cat <<-END_VERSIONS > versions.yml
+    "${task.process}":
+        bowtie2: \$(echo \$(bowtie2 --version 2>&1) | sed 's/^.*bowtie2-align-s version //; s/ .*\$//')
+        samtools: \$(echo \$(samtools --version 2>&1) | sed 's/^.*samtools //; s/Using.*\$//')
+        pigz: \$( pigz --version 2>&1 | sed 's/pigz //g' )
+    END_VERSIONS
+    """
+}
@@ -26,19 +26,25 @@ process BT2_HOST_REMOVAL_ALIGN {
     def save_ids = (args2.contains('--host_removal_save_ids')) ? "Y" : "N"
     
     """
-    bowtie2 -p ${task.cpus} \
-            -x ${index[0].getSimpleName()} \
-            -1 "${reads[0]}" -2 "${reads[1]}" \
-            $args \
-            --un-conc-gz ${prefix}.unmapped_%.fastq.gz \
-            --al-conc-gz ${prefix}.mapped_%.fastq.gz \
-            1> /dev/null \
-            2> ${prefix}.bowtie2.log
+    # host-mapped read IDs are taken directly from the SAM stream, mapped reads are never written to disk
     if [ ${save_ids} = "Y" ] ; then
-        gunzip -c ${prefix}.mapped_1.fastq.gz | awk '{if(NR%4==1) print substr(\$0, 2)}' | LC_ALL=C sort > ${prefix}.mapped_1.read_ids.txt
-        gunzip -c ${prefix}.mapped_2.fastq.gz | awk '{if(NR%4==1) print substr(\$0, 2)}' | LC_ALL=C sort > ${prefix}.mapped_2.read_ids.txt
+        bowtie2 -p ${task.cpus} \
+                -x ${index[0].getSimpleName()} \
+                -1 "${reads[0]}" -2 "${reads[1]}" \
+                $args \
+                --no-unal \
+                --un-conc-gz ${prefix}.unmapped_%.fastq.gz \
+                2> ${prefix}.bowtie2.log \
+                | host_read_ids.py --out1 ${prefix}.mapped_1.read_ids.txt --out2 ${prefix}.mapped_2.read_ids.txt
+    else
+        bowtie2 -p ${task.cpus} \
+                -x ${index[0].getSimpleName()} \
+                -1 "${reads[0]}" -2 "${reads[1]}" \
+                $args \
+                --un-conc-gz ${prefix}.unmapped_%.fastq.gz \
+                1> /dev/null \
+                2> ${prefix}.bowtie2.log
     fi
-    rm -f ${prefix}.mapped_*.fastq.gz
     cat <<-END_VERSIONS > versions.yml
     "${task.process}":
         bowtie2: \$(echo \$(bowtie2 --version 2>&1) | sed 's/^.*bowtie2-align-s version //; s/ .*\$//')
@@ -15,9 +15,20 @@ process BOWTIE2_BUILDASSEMBLYINDEX {
 
     script:
     def args = task.ext.args ?: ''
+    def cache_args = params.bowtie2_index_cache ? "--store ${params.bowtie2_index_cache} --assembly ${assembly} --version \$BT2_VERSION --build_args '${args}' --prefix bt2_index_base" : ''
+    def cache_max_size = params.bowtie2_index_cache_max_size ? "--max_size ${params.bowtie2_index_cache_max_size} --min_idle ${params.bowtie2_index_cache_min_idle}" : ''
     """
     mkdir bowtie
-    bowtie2-build --threads $task.cpus $assembly "bt2_index_base"
+    # reuse an index of identical assembly content from the persistent index store, if one is configured
+    BT2_VERSION=\$(echo \$(bowtie2 --version 2>&1) | sed 's/^.*bowtie2-align-s version //; s/ .*\$//')
+    if [ -n "${cache_args}" ] && bowtie2_index_cache.py fetch ${cache_args} ; then
+        :
+    else
+        bowtie2-build --threads $task.cpus $args $assembly "bt2_index_base"
+        if [ -n "${cache_args}" ] ; then
+            bowtie2_index_cache.py store ${cache_args} ${cache_max_size}
+        fi
+    fi
 
     cat <<-END_VERSIONS > versions.yml
     "${task.process}":
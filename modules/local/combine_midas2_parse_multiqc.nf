@@ -6,14 +6,16 @@ process COMBINE_MIDAS2_REPORTS {
     
     input:
     path snps_id_list
+    path pileup_summaries
 
     output:
     path "combined_midas2_report_mqc.yaml", emit: combined_report
     path "versions.yml", emit: versions
     
     script:
+    def pileup = pileup_summaries ? "-p ${pileup_summaries}" : ""
     """
-    combine_midas2_parse_mutliqc.py -i $snps_id_list -y combined_midas2_report_mqc.yaml
+    combine_midas2_parse_mutliqc.py -i $snps_id_list -y combined_midas2_report_mqc.yaml $pileup
     
     cat <<-END_VERSIONS > versions.yml
     "${task.process}":
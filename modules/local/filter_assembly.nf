@@ -0,0 +1,34 @@
+process FILTER_ASSEMBLY {
+    tag "${meta.assembler}-${meta.id}"
+    label 'process_low'
+
+    // Using container from metabat2 process, since this will be anyway already downloaded and contains python
+    conda "bioconda::metabat2=2.15 conda-forge::python=3.6.7 conda-forge::biopython=1.74 conda-forge::pandas=1.1.5"
+    container "${ workflow.containerEngine == 'singularity' && !task.ext.singularity_pull_docker_container ?
+        'https://depot.galaxyproject.org/singularity/mulled-v2-e25d1fa2bb6cbacd47a4f8b2308bd01ba38c5dd7:75310f02364a762e6ba5206fcd11d7529534ed6e-0' :
+        'biocontainers/mulled-v2-e25d1fa2bb6cbacd47a4f8b2308bd01ba38c5dd7:75310f02364a762e6ba5206fcd11d7529534ed6e-0' }"
+
+    input:
+    tuple val(meta), path(assembly)
+
+    output:
+    tuple val(meta), path("${meta.assembler}-${meta.id}.filtered.fa.gz")                  , emit: assembly
+    tuple val(meta), path("${meta.assembler}-${meta.id}.filtered.contig_lengths.tsv")     , emit: lengths
+    tuple val(meta), path("${meta.assembler}-${meta.id}.filtered.manifest.tsv")           , emit: manifest
+    tuple val(meta), path("${meta.assembler}-${meta.id}.filtered.filter_summary.tsv")     , emit: summary
+    path "versions.yml"                                                                   , emit: versions
+
+    script:
+    """
+    # drop contigs below the minimum length from the assembly used for binning; the kept contigs in contig_lengths.tsv
+    # restrict the BAMs of the mapping against the unfiltered assembly
+    filter_assembly.py --assembly ${assembly} \\
+                    --min_length ${params.assembly_min_contig_length} \\
+                    --prefix "${meta.assembler}-${meta.id}.filtered"
+
+    cat <<-END_VERSIONS > versions.yml
+    "${task.process}":
+        python: \$(python --version 2>&1 | sed 's/Python //g')
+    END_VERSIONS
+    """
+}
@@ -8,19 +8,24 @@ process MAG_DEPTHS {
         'biocontainers/mulled-v2-e25d1fa2bb6cbacd47a4f8b2308bd01ba38c5dd7:75310f02364a762e6ba5206fcd11d7529534ed6e-0' }"
 
     input:
-    tuple val(meta), path(bins), path(contig_depths)
+    tuple val(meta), path(bins), path(contig_depths), path(contig2bin)
 
     output:
     tuple val(meta), path("${meta.assembler}-${meta.binner}-${meta.id}-binDepths.tsv"), emit: depths
+    tuple val(meta), path("${meta.assembler}-${meta.binner}-${meta.id}-binStats*.tsv"), optional:true, emit: stats
     path "versions.yml"                                                               , emit: versions
 
     script:
+    def args = task.ext.args ?: ''
+    // with a DAS Tool contig2bin table, contigs not in any bin are reported under the name RENAME_POSTDASTOOL gives them
+    def bin_args = contig2bin ? "--contig2bin ${contig2bin} --unbinned ${meta.assembler}-${meta.binner}Unbinned-${meta.id}.fa" : "--bins ${bins}"
     """
-    get_mag_depths.py --bins ${bins} \\
+    get_mag_depths.py ${bin_args} \\
                     --depths ${contig_depths} \\
                     --assembler ${meta.assembler} \\
                     --id ${meta.id} \\
-                    --binner ${meta.binner}
+                    --binner ${meta.binner} \\
+                    $args
 
     cat <<-END_VERSIONS > versions.yml
     "${task.process}":
@@ -7,7 +7,7 @@ process MAG_DEPTHS_PLOT {
         'biocontainers/mulled-v2-d14219255233ee6cacc427e28a7caf8ee42e8c91:0a22c7568e4a509925048454dad9ab37fa8fe776-0' }"
 
     input:
-    tuple val(meta), path(depths)
+    tuple val(meta), path(depths), path(transformed)
     path(sample_groups)
 
     output:
@@ -19,6 +19,7 @@ process MAG_DEPTHS_PLOT {
     """
     plot_mag_depths_log_ordered.py --bin_depths ${depths} \
                     --groups ${sample_groups} \
+                    --transformed ${transformed} \
                     --out "${meta.assembler}-${meta.binner}-${meta.id}-binDepths.heatmap.png" 
     
     cat <<-END_VERSIONS > versions.yml
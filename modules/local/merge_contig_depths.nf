@@ -0,0 +1,29 @@
+process MERGE_CONTIG_DEPTHS {
+    tag "${meta.assembler}-${meta.id}"
+    label 'process_low'
+
+    // Using container from metabat2 process, since this will be anyway already downloaded and contains python
+    conda "bioconda::metabat2=2.15 conda-forge::python=3.6.7 conda-forge::biopython=1.74 conda-forge::pandas=1.1.5"
+    container "${ workflow.containerEngine == 'singularity' && !task.ext.singularity_pull_docker_container ?
+        'https://depot.galaxyproject.org/singularity/mulled-v2-e25d1fa2bb6cbacd47a4f8b2308bd01ba38c5dd7:75310f02364a762e6ba5206fcd11d7529534ed6e-0' :
+        'biocontainers/mulled-v2-e25d1fa2bb6cbacd47a4f8b2308bd01ba38c5dd7:75310f02364a762e6ba5206fcd11d7529534ed6e-0' }"
+
+    input:
+    tuple val(meta), path(depths, stageAs: 'sample_depths/*')
+
+    output:
+    tuple val(meta), path("${prefix}.txt.gz"), emit: depth
+    path "versions.yml"                      , emit: versions
+
+    script:
+    prefix = task.ext.prefix ?: "${meta.id}"
+    """
+    merge_contig_depths.py --depths ${[ depths ].flatten().sort { it.name }.join(" ")} \\
+                    --out ${prefix}.txt.gz
+
+    cat <<-END_VERSIONS > versions.yml
+    "${task.process}":
+        python: \$(python --version 2>&1 | sed 's/Python //g')
+    END_VERSIONS
+    """
+}
@@ -6,9 +6,8 @@ process MIDAS2_DB_BUILD {
         name = 'midas2'
         file = '/scicomp/home-pure/uel3/UnO_nf/nf-core-uno/modules/local/midas2/environment.yml'
     }
-    //input:
-    //val midasdb_name
-    //val midasdb_dir
+    input:
+    path(species_list)
 
     output:
     path("my_midasdb_uhgg"), emit: midasdb
@@ -19,8 +18,32 @@ process MIDAS2_DB_BUILD {
     def args = task.ext.args ?: '' //this may need to be put in the modules.config file, going to test as is for now then try the config file 
     def midas2_dbname = "--midasdb_name uhgg"
     def midas2_dbdir = "--midasdb_dir my_midasdb_uhgg"
+    def db_version = params.midas2_db_version ?: "\$MIDAS2_VERSION"
+    def cache_args = params.midas2_db_cache ? "--store ${params.midas2_db_cache} --name uhgg --version ${db_version}" : ''
+    def species_file = species_list ?: ''
+    def species_args = species_list ? "--species ${species_list}" : ''
     """
-    midas2 database --init $midas2_dbname $midas2_dbdir
+    MIDAS2_VERSION=\$(echo \$(midas2 --version 2>&1) | sed 's/midas2 //; s/ .*\$//')
+    # reuse the database from the persistent cache, if one is configured: the task gets a tree of links to the
+    # read-only cached files; status 2: some species are missing, only those are downloaded into the tree and
+    # stored as a new generation of the cache entry
+    status=1
+    if [ -n "${cache_args}" ] ; then
+        midas2_db_cache.py fetch ${cache_args} ${species_args} --out my_midasdb_uhgg --missing missing_species.txt --cached_species cached_species.txt && status=0 || status=\$?
+    fi
+    if [ \$status -ne 0 ] ; then
+        if [ \$status -ne 2 ] ; then
+            midas2 database --init $midas2_dbname $midas2_dbdir
+        fi
+        if [ -n "${species_file}" ] ; then
+            midas2 database --download $midas2_dbname $midas2_dbdir \\
+                --species_list \$( [ \$status -eq 2 ] && echo missing_species.txt || echo ${species_file} ) \\
+                --num_cores $task.cpus $args
+        fi
+        if [ -n "${cache_args}" ] ; then
+            midas2_db_cache.py store ${cache_args} --db my_midasdb_uhgg --species ${species_file} cached_species.txt
+        fi
+    fi
 
     cat <<-END_VERSIONS > versions.yml
     "${task.process}":
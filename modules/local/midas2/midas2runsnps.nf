@@ -0,0 +1,55 @@
+process MIDAS2_RUN_SNPS {
+    errorStrategy 'ignore'
+    tag "$meta.id"
+    label 'process_medium'
+
+    conda "${moduleDir}/environment.yml"
+
+    input:
+    path(midasdb_dir)
+    tuple val(meta), path(reads), path(species_dir), path(species_list)
+
+    output:
+    path( "midas2_output/${meta.id}/snps/log.txt" ), emit: snps_log
+    tuple val(meta), path( "midas2_output/${meta.id}/snps/snps_summary.tsv"), emit: midas2_snps
+    tuple val(meta), path( "midas2_output/${meta.id}/snps/*.snps.tsv.lz4" ), emit: per_species_pileup
+    path( "midas2_output/${meta.id}/temp/*" ), optional: true
+    path( "midas2_output/${meta.id}/bt2_indexes/snps/*" ), optional: true
+    path "versions.yml", emit: versions
+
+    script:
+    def args = task.ext.args ?: ''
+    def prefix = task.ext.prefix ?: "${meta.id}"
+    def midas2_dbname = "--midasdb_name uhgg"
+    def midas2_dbdir = "--midasdb_dir $midasdb_dir"
+    def outdir = "midas2_output"
+    """
+    # run_snps reads the run_species results from its output directory
+    mkdir -p $outdir/${meta.id}
+    ln -s ../../${species_dir} $outdir/${meta.id}/species
+
+    midas2 run_snps \\
+      --sample_name $prefix \\
+      -1 ${reads[0]} \\
+      -2 ${reads[1]} \\
+      $midas2_dbname \\
+      $midas2_dbdir \\
+      --species_list ${species_list} \\
+      $args \\
+      --num_cores $task.cpus \\
+      $outdir
+
+    cat <<-END_VERSIONS > versions.yml
+    "${task.process}":
+        midas2: \$(echo \$(midas2 --version 2>&1) | sed 's/midas2 //; s/ .*\$//')
+    END_VERSIONS
+    """
+
+    stub:
+    """
+    mkdir -p midas2_output/${meta.id}/snps
+    touch midas2_output/${meta.id}/snps/log.txt
+    touch midas2_output/${meta.id}/snps/snps_summary.tsv
+    touch midas2_output/${meta.id}/snps/stub.snps.tsv.lz4
+    """
+}
@@ -0,0 +1,51 @@
+process MIDAS2_RUN_SPECIES {
+    errorStrategy 'ignore'
+    tag "$meta.id"
+    label 'process_medium'
+
+    conda "${moduleDir}/environment.yml"
+
+    input:
+    path(midasdb_dir)
+    tuple val(meta), path(reads)
+
+    output:
+    path( "midas2_output/${meta.id}/species/log.txt" ), emit: species_log
+    tuple val(meta), path( "midas2_output/${meta.id}/species" ), emit: species_dir
+    tuple val(meta), path( "${meta.id}.species_profile.tsv" ), emit: species_profile
+    path "versions.yml", emit: versions
+
+    script:
+    def args = task.ext.args ?: ''
+    def prefix = task.ext.prefix ?: "${meta.id}"
+    def midas2_dbname = "--midasdb_name uhgg"
+    def midas2_dbdir = "--midasdb_dir $midasdb_dir"
+    def outdir = "midas2_output"
+    """
+    midas2 run_species \\
+      --sample_name $prefix \\
+      -1 ${reads[0]} \\
+      -2 ${reads[1]} \\
+      $midas2_dbname \\
+      $midas2_dbdir \\
+      $args \\
+      --num_cores $task.cpus \\
+      $outdir
+
+    # named copy for the cohort-level species selection, all profiles are called species_profile.tsv
+    cp midas2_output/${meta.id}/species/species_profile.tsv ${meta.id}.species_profile.tsv
+
+    cat <<-END_VERSIONS > versions.yml
+    "${task.process}":
+        midas2: \$(echo \$(midas2 --version 2>&1) | sed 's/midas2 //; s/ .*\$//')
+    END_VERSIONS
+    """
+
+    stub:
+    """
+    mkdir -p midas2_output/${meta.id}/species
+    touch midas2_output/${meta.id}/species/log.txt
+    touch midas2_output/${meta.id}/species/species_profile.tsv
+    touch ${meta.id}.species_profile.tsv
+    """
+}
@@ -0,0 +1,32 @@
+process MIDAS2_PILEUP_STORE {
+    tag "$meta.id"
+    label 'process_low'
+
+    // midas2_pileup_store.py exits with an error without pyarrow, there is no fallback format
+    conda "conda-forge::python=3.10 conda-forge::pandas=2.1.4 conda-forge::pyarrow=14.0.1 conda-forge::lz4-c=1.9.4"
+
+    input:
+    tuple val(meta), path(pileups)
+
+    output:
+    tuple val(meta), path("sample=${meta.id}")             , emit: store
+    tuple val(meta), path("${meta.id}.pileup_summary.tsv") , emit: summary
+    path "versions.yml"                                    , emit: versions
+
+    script:
+    def args = task.ext.args ?: ''
+    """
+    midas2_pileup_store.py --sample ${meta.id} \\
+                    --pileups ${pileups} \\
+                    --outdir sample=${meta.id} \\
+                    --summary ${meta.id}.pileup_summary.tsv \\
+                    $args
+
+    cat <<-END_VERSIONS > versions.yml
+    "${task.process}":
+        python: \$(python --version 2>&1 | sed 's/Python //g')
+        pandas: \$(python -c "import pkg_resources; print(pkg_resources.get_distribution('pandas').version)")
+        pyarrow: \$(python -c "import pyarrow; print(pyarrow.__version__)")
+    END_VERSIONS
+    """
+}
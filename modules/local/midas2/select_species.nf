@@ -0,0 +1,31 @@
+process MIDAS2_SELECT_SPECIES {
+    label 'process_single'
+
+    // Using container from multiqc since it'll be included anyway
+    conda "bioconda::multiqc=1.12"
+    container "${ workflow.containerEngine == 'singularity' && !task.ext.singularity_pull_docker_container ?
+        'https://depot.galaxyproject.org/singularity/multiqc:1.12--pyhdfd78af_0' :
+        'biocontainers/multiqc:1.12--pyhdfd78af_0' }"
+
+    input:
+    path(species_profiles)
+
+    output:
+    path("species_lists/*.species_list.txt"), emit: species_lists
+    path("midas2_species_selection.tsv")    , emit: summary
+    path "versions.yml"                     , emit: versions
+
+    script:
+    def args = task.ext.args ?: ''
+    """
+    select_midas2_species.py --profiles ${species_profiles} \\
+                    --outdir species_lists \\
+                    --summary midas2_species_selection.tsv \\
+                    $args
+
+    cat <<-END_VERSIONS > versions.yml
+    "${task.process}":
+        python: \$(python --version 2>&1 | sed 's/Python //g')
+    END_VERSIONS
+    """
+}
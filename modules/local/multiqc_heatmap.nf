@@ -0,0 +1,32 @@
+process MULTIQC_HEATMAP {
+    tag "${meta.assembler}-${meta.binner}-${meta.id}"
+
+    // Using container from MAG_DEPTHS_PLOT process, since this will be anyway already downloaded and contains numpy, pandas and scipy
+    conda "conda-forge::python=3.9 conda-forge::pandas=1.3.0 anaconda::seaborn=0.11.0"
+    container "${ workflow.containerEngine == 'singularity' && !task.ext.singularity_pull_docker_container ?
+        'https://depot.galaxyproject.org/singularity/mulled-v2-d14219255233ee6cacc427e28a7caf8ee42e8c91:0a22c7568e4a509925048454dad9ab37fa8fe776-0' :
+        'biocontainers/mulled-v2-d14219255233ee6cacc427e28a7caf8ee42e8c91:0a22c7568e4a509925048454dad9ab37fa8fe776-0' }"
+
+    input:
+    tuple val(meta), path(depths), path(transformed)
+
+    output:
+    tuple val(meta), path("${meta.assembler}-${meta.binner}-${meta.id}-binDepths.heatmap_mqc.json"), emit: heatmap
+    path "versions.yml"                                                                            , emit: versions
+
+    script:
+    def args = task.ext.args ?: ''
+    """
+    multiqc_bin_depths_heatmap.py --transformed ${transformed} \\
+                    --id "bin_depth_heatmap_${meta.binner.toLowerCase()}" \\
+                    --out "${meta.assembler}-${meta.binner}-${meta.id}-binDepths.heatmap_mqc.json" \\
+                    $args
+
+    cat <<-END_VERSIONS > versions.yml
+    "${task.process}":
+        python: \$(python --version 2>&1 | sed 's/Python //g')
+        pandas: \$(python -c "import pkg_resources; print(pkg_resources.get_distribution('pandas').version)")
+        scipy: \$(python -c "import pkg_resources; print(pkg_resources.get_distribution('scipy').version)")
+    END_VERSIONS
+    """
+}
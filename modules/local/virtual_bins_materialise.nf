@@ -0,0 +1,31 @@
+process VIRTUAL_BINS_MATERIALISE {
+    tag "${meta.assembler}-${meta.id}"
+    label 'process_low'
+
+    // Using container from metabat2 process, since this will be anyway already downloaded and contains python
+    conda "bioconda::metabat2=2.15 conda-forge::python=3.6.7 conda-forge::biopython=1.74 conda-forge::pandas=1.1.5"
+    container "${ workflow.containerEngine == 'singularity' && !task.ext.singularity_pull_docker_container ?
+        'https://depot.galaxyproject.org/singularity/mulled-v2-e25d1fa2bb6cbacd47a4f8b2308bd01ba38c5dd7:75310f02364a762e6ba5206fcd11d7529534ed6e-0' :
+        'biocontainers/mulled-v2-e25d1fa2bb6cbacd47a4f8b2308bd01ba38c5dd7:75310f02364a762e6ba5206fcd11d7529534ed6e-0' }"
+
+    input:
+    tuple val(meta), path(assembly), path(contig2bin)
+
+    output:
+    tuple val(meta), path("bins/*.fa")         , optional:true, emit: bins
+    path "versions.yml"                        , emit: versions
+
+    script:
+    def args = task.ext.args ?: ''
+    """
+    virtual_bins.py materialise --assembly ${assembly} \\
+                    --contig2bin ${contig2bin} \\
+                    --outdir bins \\
+                    $args
+
+    cat <<-END_VERSIONS > versions.yml
+    "${task.process}":
+        python: \$(python --version 2>&1 | sed 's/Python //g')
+    END_VERSIONS
+    """
+}
@@ -7,6 +7,8 @@
 include { MAXBIN2                              } from '../../modules/nf-core/maxbin2/main'
 include { METABAT2_METABAT2                    } from '../../modules/nf-core/metabat2/metabat2/main'
 include { METABAT2_JGISUMMARIZEBAMCONTIGDEPTHS } from '../../modules/nf-core/metabat2/jgisummarizebamcontigdepths/main'
+include { METABAT2_JGISUMMARIZEBAMCONTIGDEPTHS as METABAT2_JGISUMMARIZEBAMCONTIGDEPTHS_SAMPLE } from '../../modules/nf-core/metabat2/jgisummarizebamcontigdepths/main'
+include { MERGE_CONTIG_DEPTHS                  } from '../../modules/local/merge_contig_depths'
 include { GUNZIP as GUNZIP_BINS                } from '../../modules/nf-core/gunzip/main'
 include { GUNZIP as GUNZIP_UNBINS              } from '../../modules/nf-core/gunzip/main'
 
@@ -35,9 +37,35 @@ workflow BINNING {
                                     [ meta_new, bams, bais ]
                                 }
 
-    METABAT2_JGISUMMARIZEBAMCONTIGDEPTHS ( ch_summarizedepth_input )
-
-    ch_metabat_depths = METABAT2_JGISUMMARIZEBAMCONTIGDEPTHS.out.depth
+    if (params.contig_depths_per_sample) {
+        // summarise depths of each BAM in its own task and merge the per-sample columns afterwards,
+        // so that adding a sample only requires summarising its own BAM
+        ch_summarizedepth_per_sample = ch_summarizedepth_input
+            .flatMap { meta, bams, bais ->
+                def bam_list = [ bams ].flatten()
+                [ bam_list, [ bais ].flatten() ].transpose().collect { bam, bai ->
+                    [ meta + [depth_sample: bam.baseName, depth_samples: bam_list.size()], bam, bai ]
+                }
+            }
+        METABAT2_JGISUMMARIZEBAMCONTIGDEPTHS_SAMPLE ( ch_summarizedepth_per_sample )
+        ch_merge_depths_input = METABAT2_JGISUMMARIZEBAMCONTIGDEPTHS_SAMPLE.out.depth
+            .map { meta, depth ->
+                def meta_new = meta - meta.subMap('depth_sample', 'depth_samples')
+                [ groupKey(meta_new, meta.depth_samples), depth ]
+            }
+            .groupTuple()
+            .map { meta, depths -> [ meta.getGroupTarget(), depths ] }
+        MERGE_CONTIG_DEPTHS ( ch_merge_depths_input )
+        ch_contig_depths = MERGE_CONTIG_DEPTHS.out.depth
+        ch_versions = ch_versions.mix(METABAT2_JGISUMMARIZEBAMCONTIGDEPTHS_SAMPLE.out.versions.first())
+        ch_versions = ch_versions.mix(MERGE_CONTIG_DEPTHS.out.versions.first())
+    } else {
+        METABAT2_JGISUMMARIZEBAMCONTIGDEPTHS ( ch_summarizedepth_input )
+        ch_contig_depths = METABAT2_JGISUMMARIZEBAMCONTIGDEPTHS.out.depth
+        ch_versions = ch_versions.mix(METABAT2_JGISUMMARIZEBAMCONTIGDEPTHS.out.versions.first())
+    }
+
+    ch_metabat_depths = ch_contig_depths
         .map { meta, depths ->
             def meta_new = meta.clone()
             meta_new['binner'] = 'MetaBAT2'
@@ -45,8 +73,6 @@ workflow BINNING {
             [ meta_new, depths ]
         }
 
-    ch_versions = ch_versions.mix(METABAT2_JGISUMMARIZEBAMCONTIGDEPTHS.out.versions.first())
-
     // combine depths back with assemblies
     ch_metabat2_input = assemblies
         .map { meta, assembly, bams, bais ->
@@ -115,7 +141,7 @@ workflow BINNING {
     bins_gz                                      = ch_binning_results_gzipped_final
     unbinned                                     = ch_splitfasta_results_gunzipped
     unbinned_gz                                  = SPLIT_FASTA.out.unbinned
-    metabat2depths                               = METABAT2_JGISUMMARIZEBAMCONTIGDEPTHS.out.depth
+    metabat2depths                               = ch_contig_depths
     versions                                     = ch_versions
 }
 
@@ -4,8 +4,10 @@
 //               https://nf-co.re/join
 // TODO nf-core: A subworkflow SHOULD import at least two modules
 
+include { FILTER_ASSEMBLY             } from '../../modules/local/filter_assembly'
 include { BOWTIE2_BUILDASSEMBLYINDEX } from '../../modules/local/bowtie2/buildassemblyindex'
 include { BOWTIE2_ALIGNASSEMBLY      } from '../../modules/local/bowtie2/alignassembly'
+include { BOWTIE2_ALIGNASSEMBLY_BATCH } from '../../modules/local/bowtie2/alignassembly_batch'
 
 workflow BINNING_PREP {
 
@@ -14,33 +16,83 @@ workflow BINNING_PREP {
     reads                // channel: [ val(meta), [ reads ] ]
 
     main:
+    ch_versions = Channel.empty()
     // build bowtie2 index from coassembly of all reads using group 
     BOWTIE2_BUILDASSEMBLYINDEX (assemblies)
+    // drop contigs too short for binning from the assembly, BAMs and depth tables; reads are still mapped against
+    // the unfiltered index, so that reads aligned to dropped contigs are counted and alignment rates do not change
+    if (params.assembly_min_contig_length) {
+        FILTER_ASSEMBLY (assemblies)
+        ch_versions = ch_versions.mix(FILTER_ASSEMBLY.out.versions.first())
+        ch_assembly_index = BOWTIE2_BUILDASSEMBLYINDEX.out.bt2_index
+            .join(FILTER_ASSEMBLY.out.assembly)
+            .join(FILTER_ASSEMBLY.out.lengths)
+            .map { meta, assembly, index, filtered, lengths -> [ meta, filtered, index, lengths ] }
+    } else {
+        ch_assembly_index = BOWTIE2_BUILDASSEMBLYINDEX.out.bt2_index
+            .map { meta, assembly, index -> [ meta, assembly, index, [] ] }
+    }
     if (params.binning_map_mode == 'group'){
         // combine assemblies with reads of all samples
         ch_reads_bowtie2 = reads.map{ meta, reads -> [ meta.group, meta, reads] }
-        ch_bowtie2_input = BOWTIE2_BUILDASSEMBLYINDEX.out.bt2_index
-            .map {meta, assembly, index -> [meta.group, meta, assembly, index ] }
+        ch_bowtie2_input = ch_assembly_index
+            .map {meta, assembly, index, lengths -> [meta.group, meta, assembly, index, lengths ] }
             .combine(ch_reads_bowtie2, by:0)
-            .map {group, assembly_meta, assembly, index, reads_meta, reads -> [assembly_meta, assembly, index, reads_meta, reads ]}
+            .map {group, assembly_meta, assembly, index, lengths, reads_meta, reads -> [assembly_meta, assembly, index, lengths, reads_meta, reads ]}
     } else {
         // i.e. --binning_map_mode 'own'
         // combine assemblies (not co-assembled) with reads from own sample
         ch_reads_bowtie2 = reads.map{ meta, reads -> [ meta.id, meta, reads ] }
-        ch_bowtie2_input = BOWTIE2_BUILDASSEMBLYINDEX.out.bt2_index
-            .map { meta, assembly, index -> [ meta.id, meta, assembly, index ] }
+        ch_bowtie2_input = ch_assembly_index
+            .map { meta, assembly, index, lengths -> [ meta.id, meta, assembly, index, lengths ] }
             .combine(ch_reads_bowtie2, by: 0)
-            .map { id, assembly_meta, assembly, index, reads_meta, reads -> [ assembly_meta, assembly, index, reads_meta, reads ] }
+            .map { id, assembly_meta, assembly, index, lengths, reads_meta, reads -> [ assembly_meta, assembly, index, lengths, reads_meta, reads ] }
     }
     
-    BOWTIE2_ALIGNASSEMBLY (ch_bowtie2_input)
-    ch_grouped_mappings = BOWTIE2_ALIGNASSEMBLY.out.mappings
-        .groupTuple(by:0)
-        .map {meta, assembly, bams, bais -> [meta, assembly.sort()[0], bams, bais ] }
+    if (params.bowtie2_batch_mapping) {
+        // map chunks of samples against each assembly in one task, chunks hold up to bowtie2_batch_max_size of reads
+        def batch_max_size = (params.bowtie2_batch_max_size as nextflow.util.MemoryUnit).toBytes()
+        ch_bowtie2_batch_input = ch_bowtie2_input
+            .map { assembly_meta, assembly, index, lengths, reads_meta, reads -> [ assembly_meta, [ assembly, index, lengths ], reads_meta, reads ] }
+            .groupTuple(by: 0)
+            .flatMap { assembly_meta, assembly_index, reads_metas, reads ->
+                def chunks = []
+                def chunk = []
+                def chunk_size = 0
+                [ reads_metas, reads ].transpose().each { reads_meta, sample_reads ->
+                    def sample_size = sample_reads.sum { it.size() }
+                    if (chunk && chunk_size + sample_size > batch_max_size) {
+                        chunks << chunk
+                        chunk = []
+                        chunk_size = 0
+                    }
+                    chunk << [ reads_meta, sample_reads ]
+                    chunk_size += sample_size
+                }
+                if (chunk) chunks << chunk
+                chunks.collect { samples ->
+                    [ assembly_meta, assembly_index[0][0], assembly_index[0][1], assembly_index[0][2], samples.collect { it[0] }, samples.collect { it[1] }.flatten() ]
+                }
+            }
+        BOWTIE2_ALIGNASSEMBLY_BATCH (ch_bowtie2_batch_input)
+        ch_grouped_mappings = BOWTIE2_ALIGNASSEMBLY_BATCH.out.mappings
+            .groupTuple(by:0)
+            .map {meta, assembly, bams, bais -> [meta, assembly.sort()[0], bams.flatten(), bais.flatten() ] }
+        ch_bowtie2_assembly_log = BOWTIE2_ALIGNASSEMBLY_BATCH.out.log
+        ch_bowtie2_version = BOWTIE2_ALIGNASSEMBLY_BATCH.out.versions
+    } else {
+        BOWTIE2_ALIGNASSEMBLY (ch_bowtie2_input)
+        ch_grouped_mappings = BOWTIE2_ALIGNASSEMBLY.out.mappings
+            .groupTuple(by:0)
+            .map {meta, assembly, bams, bais -> [meta, assembly.sort()[0], bams, bais ] }
+        ch_bowtie2_assembly_log = BOWTIE2_ALIGNASSEMBLY.out.log
+        ch_bowtie2_version = BOWTIE2_ALIGNASSEMBLY.out.versions
+    }
 
     emit:
     // TODO nf-core: edit emitted channels
-    bowtie2_assembly_multiqc = BOWTIE2_ALIGNASSEMBLY.out.log.map { assembly_meta, reads_meta, log -> [ log ] }
-    bowtie2_version          = BOWTIE2_ALIGNASSEMBLY.out.versions
+    bowtie2_assembly_multiqc = ch_bowtie2_assembly_log.map { assembly_meta, reads_meta, log -> [ log ] }
+    bowtie2_version          = ch_bowtie2_version
     grouped_mappings         = ch_grouped_mappings
+    versions                 = ch_versions
 }
\ No newline at end of file
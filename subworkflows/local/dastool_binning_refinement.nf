@@ -9,6 +9,7 @@ include { DASTOOL_FASTATOCONTIG2BIN as DASTOOL_FASTATOCONTIG2BIN_MAXBIN2      }
 include { DASTOOL_DASTOOL                                                     } from '../../modules/nf-core/dastool/dastool/main'
 include { RENAME_PREDASTOOL                                                   } from '../../modules/local/rename_predastool'
 include { RENAME_POSTDASTOOL                                                  } from '../../modules/local/rename_postdastool'
+include { VIRTUAL_BINS_MATERIALISE                                            } from '../../modules/local/virtual_bins_materialise'
 
 workflow DASTOOL_BINNING_REFINEMENT {
 
@@ -60,8 +61,20 @@ workflow DASTOOL_BINNING_REFINEMENT {
     // Run DAStool
     DASTOOL_DASTOOL(ch_input_for_dastool, [], [])
     ch_versions = ch_versions.mix(DASTOOL_DASTOOL.out.versions.first())
+
+    // with virtual bins DAS Tool only writes the contig2bin table, which MAG_DEPTHS reads directly;
+    // bin FASTA files are only written for CheckM, in one pass over the assembly
+    if ( params.virtual_bins && params.skip_binqc ) {
+        ch_dastool_bins = Channel.empty()
+    } else if ( params.virtual_bins ) {
+        VIRTUAL_BINS_MATERIALISE ( ch_contigs_for_dastool.join(DASTOOL_DASTOOL.out.contig2bin, by: 0) )
+        ch_dastool_bins = VIRTUAL_BINS_MATERIALISE.out.bins
+        ch_versions = ch_versions.mix(VIRTUAL_BINS_MATERIALISE.out.versions.first())
+    } else {
+        ch_dastool_bins = DASTOOL_DASTOOL.out.bins
+    }
     
-    ch_dastool_bins_newmeta = DASTOOL_DASTOOL.out.bins.transpose()
+    ch_dastool_bins_newmeta = ch_dastool_bins.transpose()
         .map {
             meta, bin ->
                 if (bin.name != "unbinned.fa") {
@@ -75,7 +88,7 @@ workflow DASTOOL_BINNING_REFINEMENT {
                 def meta_new = meta + [refinement: 'dastool_refined']
                 [ meta_new, bins ]
             }
-    ch_input_for_renamedastool = DASTOOL_DASTOOL.out.bins
+    ch_input_for_renamedastool = ch_dastool_bins
         .map {
             meta, bins ->
                 def meta_new = meta + [refinement: 'dastool_refined', binner: 'DASTool']
@@ -90,10 +103,18 @@ workflow DASTOOL_BINNING_REFINEMENT {
                 [meta_new, bins]
         }
 
+    refined_contig2bin = DASTOOL_DASTOOL.out.contig2bin
+        .map {
+            meta, contig2bin ->
+                def meta_new = meta + [refinement: 'dastool_refined', binner: 'DASTool']
+                [ meta_new, contig2bin ]
+            }
+
     emit:
     refined_bins                = ch_dastool_bins_newmeta
     refined_unbins              = refined_unbins
     contig2bin                  = DASTOOL_DASTOOL.out.contig2bin
+    refined_contig2bin          = refined_contig2bin
     versions                    = ch_versions
 }
 
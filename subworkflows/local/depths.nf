@@ -1,6 +1,8 @@
 include { MAG_DEPTHS                            } from '../../modules/local/mag_depths'
+include { MAG_DEPTHS_TRANSFORM                  } from '../../modules/local/mag_depths_transform'
 include { MAG_DEPTHS_PLOT                       } from '../../modules/local/mag_depths_plot'
 include { MAG_DEPTHS_SUMMARY                    } from '../../modules/local/mag_depths_summary'
+include { MULTIQC_HEATMAP                       } from '../../modules/local/multiqc_heatmap'
 /*
  * Get number of columns in file (first line)
  */
@@ -14,6 +16,7 @@ workflow DEPTHS {
     bins_unbins     //channel: val(meta), [ path(bins) ]
     depths          //channel: val(meta), path(depths)
     reads           //channel: val(meta), path(reads)
+    contig2bin      //channel: val(meta), path(contig2bin), virtual bins instead of bin FASTA files
 
     main:
     ch_versions = Channel.empty()
@@ -38,11 +41,23 @@ workflow DEPTHS {
         .groupTuple(by: [0,2])
         .map {
             meta, bins, depth ->
-            [meta, bins.unique().flatten(), depth]
+            [meta, bins.unique().flatten(), depth, []]
         }
 
+    // DAS Tool contig2bin tables cover refined bins and unbinned contigs, so each is one MAG_DEPTHS task on its own
+    ch_depth_input_contig2bin = contig2bin
+        .map {
+            meta, table ->
+            def meta_combine = meta - meta.subMap('binner','refinement')
+            [meta_combine, meta - meta.subMap('refinement'), table]
+        }
+        .combine(depths, by: 0)
+        .map {
+            meta_combine, meta, table, depth ->
+            [meta, [], depth, table]
+        }
 
-    MAG_DEPTHS ( ch_depth_input )
+    MAG_DEPTHS ( ch_depth_input.mix(ch_depth_input_contig2bin) )
     ch_versions = ch_versions.mix(MAG_DEPTHS.out.versions)
 
     // Plot bin depths heatmap for each assembly and mapped samples (according to `binning_map_mode`)
@@ -56,8 +71,14 @@ workflow DEPTHS {
             if (getColNo(bin_depths_file) > 2) [ meta, bin_depths_file ]
         }
 
-    MAG_DEPTHS_PLOT ( ch_mag_depths_plot, ch_sample_groups.collect() )
-    //MULTIQC_HEATMAP ( ch_mag_depths_plot )
+    // Compute CLR, log10 and relative abundance matrices and bin orderings once, shared by plots and MultiQC output
+    MAG_DEPTHS_TRANSFORM ( ch_mag_depths_plot )
+    ch_versions = ch_versions.mix( MAG_DEPTHS_TRANSFORM.out.versions )
+
+    ch_mag_depths_transformed = ch_mag_depths_plot.join( MAG_DEPTHS_TRANSFORM.out.transformed )
+    MAG_DEPTHS_PLOT ( ch_mag_depths_transformed, ch_sample_groups.collect() )
+    // Downsampled heatmap for MultiQC, size of the report section is bounded independent of number of bins and samples
+    MULTIQC_HEATMAP ( ch_mag_depths_transformed )
     //Depth files that are coming from bins and failed binning refinement are concatenated per meta
     ch_mag_depth_out = MAG_DEPTHS.out.depths
         .collectFile(keepHeader: true) {
@@ -67,12 +88,12 @@ workflow DEPTHS {
 
     MAG_DEPTHS_SUMMARY ( ch_mag_depth_out.collect() )
     ch_versions = ch_versions.mix( MAG_DEPTHS_PLOT.out.versions )
-    //ch_versions = ch_versions.mix( MULTIQC_HEATMAP.out.versions )
+    ch_versions = ch_versions.mix( MULTIQC_HEATMAP.out.versions )
     ch_versions = ch_versions.mix( MAG_DEPTHS_SUMMARY.out.versions )
 
     emit:
     depths_summary  = MAG_DEPTHS_SUMMARY.out.summary
     heatmap         = MAG_DEPTHS_PLOT.out.heatmap
-    multiqc_heatmap = MAG_DEPTHS_PLOT.out.log_depths.map{ meta, file -> file }
+    multiqc_heatmap = MULTIQC_HEATMAP.out.heatmap.map{ meta, file -> file }
     versions        = ch_versions
 }
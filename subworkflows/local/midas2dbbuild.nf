@@ -5,13 +5,14 @@ workflow MIDAS2_DB {
     take:
 
     main:
-    // download the uhgg database 
+    // download the uhgg database, or reuse it from the persistent cache
+    ch_species_list = params.midas2_db_species ? file(params.midas2_db_species, checkIfExists: true) : []
     MIDAS2_DB_BUILD( 
+        ch_species_list
     )
         
     emit:
-    // TODO nf-core: edit emitted channels
-    midas2_db = MIDAS2_DB_BUILD.out.midasdb
-    midas2_db_metadata = MIDAS2_DB_BUILD.out.metadata
-    midas2_db_version = MIDAS2_DB_BUILD.out.versions
+    midasdb = MIDAS2_DB_BUILD.out.midasdb
+    metadata = MIDAS2_DB_BUILD.out.metadata
+    versions = MIDAS2_DB_BUILD.out.versions
 }
\ No newline at end of file
@@ -1,23 +1,45 @@
-include { MIDAS2_RUN_SPECIES } from '../../modules/local/midas2/midas2runspecies'
-include { MIDAS2_RUN_SNPS    } from '../../modules/local/midas2/midas2runsnps'
+include { MIDAS2_RUN_SPECIES    } from '../../modules/local/midas2/midas2runspecies'
+include { MIDAS2_SELECT_SPECIES } from '../../modules/local/midas2/select_species'
+include { MIDAS2_RUN_SNPS       } from '../../modules/local/midas2/midas2runsnps'
 
 workflow MIDAS2_SPECIES_SNPS_PARSE {
 
 	take:
+	midasdb              // channel: [ path(midasdb_dir) ]
 	reads                // channel: [ val(meta), [ reads ] ]
 	
 	main:
-	MIDAS2_RUN_SPECIES(reads)
-	
-	MIDAS2_RUN_SNPS(MIDAS2_RUN_SPECIES.out, reads)
+	ch_versions = Channel.empty()
+
+	MIDAS2_RUN_SPECIES(midasdb, reads)
+	ch_versions = ch_versions.mix(MIDAS2_RUN_SPECIES.out.versions.first())
+
+	// species lists are selected across all samples, so SNP calling waits for every species profile
+	MIDAS2_SELECT_SPECIES(MIDAS2_RUN_SPECIES.out.species_profile.map { it[1] }.collect())
+	ch_versions = ch_versions.mix(MIDAS2_SELECT_SPECIES.out.versions)
+
+	ch_species_lists = MIDAS2_SELECT_SPECIES.out.species_lists
+		.flatten()
+		.map { species_list -> [ species_list.name - '.species_list.txt', species_list ] }
+
+	// samples without any selected species are not genotyped
+	ch_input_for_snps = reads
+		.join(MIDAS2_RUN_SPECIES.out.species_dir)
+		.map { meta, reads, species_dir -> [ meta.id, meta, reads, species_dir ] }
+		.join(ch_species_lists)
+		.filter { id, meta, reads, species_dir, species_list -> species_list.size() > 0 }
+		.map { id, meta, reads, species_dir, species_list -> [ meta, reads, species_dir, species_list ] }
 
+	MIDAS2_RUN_SNPS(midasdb, ch_input_for_snps)
+	ch_versions = ch_versions.mix(MIDAS2_RUN_SNPS.out.versions.first())
 	
 	emit:
 	midas2_species_log          = MIDAS2_RUN_SPECIES.out.species_log
-    midas2_species_id           = MIDAS2_RUN_SPECIES.out.species_id
+	midas2_species_id           = MIDAS2_RUN_SPECIES.out.species_profile
+	midas2_species_selection    = MIDAS2_SELECT_SPECIES.out.summary
 	midas2_snps_log             = MIDAS2_RUN_SNPS.out.snps_log
-    midas2_snps                 = MIDAS2_RUN_SNPS.out.midas2_snps
+	midas2_snps                 = MIDAS2_RUN_SNPS.out.midas2_snps
 	midas2_pileup               = MIDAS2_RUN_SNPS.out.per_species_pileup
-	midas2_species_snps_version = MIDAS2_RUN_SNPS.out.versions
+	versions                    = ch_versions
 }
 	
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the scripts in bin/ are not a package, make them importable by module name
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "bin"))
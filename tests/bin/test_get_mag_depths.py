@@ -0,0 +1,18 @@
+import pytest
+
+import get_mag_depths
+
+REQUIRED = ["--contig2bin", "c2b.tsv", "--depths", "depths.txt.gz", "--assembler", "MEGAHIT", "--id", "g1", "--binner", "MetaBAT2"]
+
+
+@pytest.mark.parametrize("trim_fraction", ["0", "0.1", "0.49"])
+def test_trim_fraction_accepted(trim_fraction):
+    assert get_mag_depths.parse_args(REQUIRED + ["--trim_fraction", trim_fraction]).trim_fraction == float(trim_fraction)
+
+
+@pytest.mark.parametrize("trim_fraction", ["-0.1", "0.5", "0.7"])
+def test_trim_fraction_rejected(trim_fraction, capsys):
+    with pytest.raises(SystemExit) as excinfo:
+        get_mag_depths.parse_args(REQUIRED + ["--trim_fraction", trim_fraction])
+    assert excinfo.value.code == 2
+    assert "--trim_fraction" in capsys.readouterr().err
@@ -0,0 +1,35 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import multiqc_bin_depths_heatmap
+import transform_mag_depths
+
+
+def write_bin_depths(path, n_bins, n_samples):
+    rng = np.random.default_rng(1)
+    depths = rng.gamma(0.5, 10.0, size=(n_bins, n_samples)) * (rng.random((n_bins, n_samples)) > 0.3)
+    df = pd.DataFrame(
+        depths,
+        index=["bin_" + str(i) + ".fa" for i in range(n_bins)],
+        columns=["sample_" + str(i) for i in range(n_samples)],
+    )
+    df.index.name = "bin"
+    df.to_csv(path, sep="\t")
+
+
+@pytest.mark.parametrize("n_bins, select_by", [(8, "prevalence"), (80, "prevalence"), (80, "variance")])
+def test_tsv_and_transformed_give_same_heatmap(tmp_path, n_bins, select_by):
+    bin_depths = str(tmp_path / "binDepths.tsv")
+    transformed = str(tmp_path / "transformed.npz")
+    write_bin_depths(bin_depths, n_bins, 6)
+    transform_mag_depths.main(["--bin_depths", bin_depths, "--out", transformed])
+
+    options = ["--top_bins", "20", "--select_by", select_by]
+    multiqc_bin_depths_heatmap.main(["--bin_depths", bin_depths, "--out", str(tmp_path / "tsv_mqc.json")] + options)
+    multiqc_bin_depths_heatmap.main(["--transformed", transformed, "--out", str(tmp_path / "npz_mqc.json")] + options)
+
+    with open(tmp_path / "tsv_mqc.json") as tsv_file, open(tmp_path / "npz_mqc.json") as npz_file:
+        assert json.load(tsv_file) == json.load(npz_file)
@@ -0,0 +1,91 @@
+import csv
+import os
+import re
+
+import pytest
+
+import select_midas2_species
+
+PROFILE_COLUMNS = ["species_id", "marker_read_counts", "median_marker_coverage", "unique_fraction_covered"]
+MODULES_CONFIG = os.path.join(os.path.dirname(__file__), "..", "..", "conf", "modules.config")
+
+
+def write_profile(path, rows):
+    with open(path, "w") as outfile:
+        print("\t".join(PROFILE_COLUMNS), file=outfile)
+        for row in rows:
+            print("\t".join(str(value) for value in row), file=outfile)
+
+
+def read_list(path):
+    with open(path) as infile:
+        return [line.strip() for line in infile if line.strip()]
+
+
+def read_summary(path):
+    with open(path) as infile:
+        return {row["sample"]: row for row in csv.DictReader(infile, delimiter="\t")}
+
+
+def run_snps_args():
+    # ext.args of MIDAS2_RUN_SNPS as written in conf/modules.config
+    with open(MODULES_CONFIG) as infile:
+        block = re.search(r"withName: MIDAS2_RUN_SNPS \{(.*?)\n    \}", infile.read(), re.S).group(1)
+    return re.search(r'ext\.args = "([^"]*)"', block).group(1)
+
+
+def run_snps_species(species_list, profile_rows, args):
+    # species run_snps genotypes: the --species_list intersected with its own per-sample selection by marker
+    # coverage, which --select_threshold=-1 disables
+    threshold = re.search(r"--select_threshold[= ](\S+)", args)
+    if threshold and threshold.group(1) == "-1":
+        return set(species_list)
+    min_coverage = float(threshold.group(1).split(",")[0]) if threshold else 2.0
+    return set(species_list) & set(row[0] for row in profile_rows if row[2] >= min_coverage)
+
+
+@pytest.fixture
+def cohort(tmp_path):
+    # species_b only passes the thresholds in sample_1, sample_2 detects it below threshold and misses species_c
+    profiles = {
+        "sample_1": [("species_a", 100, 5.0, 0.9), ("species_b", 80, 4.0, 0.8), ("species_c", 50, 3.0, 0.7)],
+        "sample_2": [("species_a", 120, 6.0, 0.9), ("species_b", 3, 0.5, 0.1)],
+    }
+    files = []
+    for sample, rows in profiles.items():
+        files.append(str(tmp_path / (sample + select_midas2_species.SUFFIX)))
+        write_profile(files[-1], rows)
+    return profiles, files
+
+
+def test_shared_species_reach_run_snps(tmp_path, cohort):
+    profiles, files = cohort
+    outdir = tmp_path / "lists"
+    select_midas2_species.main(
+        ["--profiles"] + files + ["--mode", "shared", "--outdir", str(outdir), "--summary", str(tmp_path / "summary.tsv")]
+    )
+    species_list = read_list(outdir / "sample_2.species_list.txt")
+    assert "species_b" in species_list
+    assert run_snps_species(species_list, profiles["sample_2"], run_snps_args()) == set(species_list)
+
+
+def test_skipped_species_are_detected_but_not_selected(tmp_path, cohort):
+    profiles, files = cohort
+    summary_file = str(tmp_path / "summary.tsv")
+    select_midas2_species.main(
+        ["--profiles"] + files + ["--mode", "shared", "--outdir", str(tmp_path / "lists"), "--summary", summary_file]
+    )
+    summary = read_summary(summary_file)
+    # sample_2 detected 2 species, 3 are selected for it: nothing is skipped, not -1
+    assert summary["sample_2"]["species_detected"] == "2"
+    assert summary["sample_2"]["species_selected"] == "3"
+    assert summary["sample_2"]["species_skipped"] == "0"
+    assert summary["sample_2"]["fraction_marker_reads_skipped"] == "0.0000"
+
+    select_midas2_species.main(
+        ["--profiles"] + files + ["--mode", "per_sample", "--outdir", str(tmp_path / "lists"), "--summary", summary_file]
+    )
+    summary = read_summary(summary_file)
+    assert summary["sample_2"]["species_skipped"] == "1"
+    assert summary["sample_2"]["fraction_marker_reads_skipped"] == "%.4f" % (3 / 123)
+    assert summary["total"]["species_skipped"] == "1"
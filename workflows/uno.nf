@@ -42,7 +42,9 @@ ch_multiqc_custom_methods_description = params.multiqc_methods_description ? fil
 include { INPUT_CHECK                   } from '../subworkflows/local/input_check'
 include { MIDAS2_DB                     } from '../subworkflows/local/midas2dbbuild'
 include { MIDAS2_SPECIES_SNPS           } from '../modules/local/midas2/speciessnps'
+include { MIDAS2_SPECIES_SNPS_PARSE     } from '../subworkflows/local/midas2speciessnps'
 include { MIDAS2_PARSE_GENUS_SPECIES    } from '../modules/local/midas2/parse_genus_species'
+include { MIDAS2_PILEUP_STORE           } from '../modules/local/midas2/pileup_store'
 include { BT2_HOST_REMOVAL_BUILD        } from '../modules/local/bowtie2/bt2_host_removal_build'
 include { BT2_HOST_REMOVAL_ALIGN        } from '../modules/local/bowtie2/bt2_host_removal_align'
 //include { BT2_HOST_REMOVAL_ALIGN_VERIFY } from '../modules/local/bowtie2/bt2_host_removal_align_verify'
@@ -135,16 +137,34 @@ workflow UNO {
             ch_midas2_db_metadata_for_parse = ch_midas2_db_metadata
         }
         
-        MIDAS2_SPECIES_SNPS (ch_midas2_db_for_snps,
-            ch_raw_short_reads
-        )
-        ch_versions = ch_versions.mix(MIDAS2_SPECIES_SNPS.out.versions.first())
+        if ( params.midas2_species_selection ) {
+            MIDAS2_SPECIES_SNPS_PARSE (ch_midas2_db_for_snps,
+                ch_raw_short_reads
+            )
+            ch_versions = ch_versions.mix(MIDAS2_SPECIES_SNPS_PARSE.out.versions)
+            ch_midas2_snps = MIDAS2_SPECIES_SNPS_PARSE.out.midas2_snps
+            ch_midas2_pileup = MIDAS2_SPECIES_SNPS_PARSE.out.midas2_pileup
+        } else {
+            MIDAS2_SPECIES_SNPS (ch_midas2_db_for_snps,
+                ch_raw_short_reads
+            )
+            ch_versions = ch_versions.mix(MIDAS2_SPECIES_SNPS.out.versions.first())
+            ch_midas2_snps = MIDAS2_SPECIES_SNPS.out.midas2_snps
+            ch_midas2_pileup = MIDAS2_SPECIES_SNPS.out.per_species_pileup
+        }
         MIDAS2_PARSE_GENUS_SPECIES (ch_midas2_db_metadata_for_parse, 
-            MIDAS2_SPECIES_SNPS.out.midas2_snps
+            ch_midas2_snps
         )
         ch_versions = ch_versions.mix(MIDAS2_PARSE_GENUS_SPECIES.out.versions.first())
         midas2_reports = MIDAS2_PARSE_GENUS_SPECIES.out.snps_id_list.map { it[1] }.collect()
-        COMBINE_MIDAS2_REPORTS (midas2_reports)
+        if ( params.midas2_pileup_store ) {
+            MIDAS2_PILEUP_STORE ( ch_midas2_pileup )
+            ch_versions = ch_versions.mix(MIDAS2_PILEUP_STORE.out.versions.first())
+            ch_midas2_pileup_summaries = MIDAS2_PILEUP_STORE.out.summary.map { it[1] }.collect()
+        } else {
+            ch_midas2_pileup_summaries = Channel.value([])
+        }
+        COMBINE_MIDAS2_REPORTS (midas2_reports, ch_midas2_pileup_summaries)
         ch_versions = ch_versions.mix(COMBINE_MIDAS2_REPORTS.out.versions.first())
     }
 
@@ -240,6 +260,7 @@ workflow UNO {
     if ( !params.skip_binning ) {    
         BINNING_PREP ( ch_assemblies, ch_short_reads_assembly )
                 ch_versions = ch_versions.mix(BINNING_PREP.out.bowtie2_version.first())
+                ch_versions = ch_versions.mix(BINNING_PREP.out.versions)
         // Create a text file channel with the reads to pass to maxbin2 to calculate abundance
         //text_file_ch = ch_short_reads_grouped
             //.map { sample, reads1, reads2 -> 
@@ -287,8 +308,18 @@ workflow UNO {
             ch_input_for_postbinning_bins        = ch_binning_results_bins
             ch_input_for_postbinning_bins_unbins = ch_binning_results_bins.mix(ch_binning_results_unbins)
         }
+        // with virtual bins, depths of refined bins are computed from the DAS Tool contig2bin tables instead of bin FASTA files
+        ch_depths_bins_unbins = ch_input_for_postbinning_bins_unbins
+        ch_depths_contig2bin  = Channel.empty()
+        if ( params.refine_bins_dastool && params.virtual_bins ) {
+            ch_depths_bins_unbins = ch_input_for_postbinning_bins_unbins
+                .filter { meta, bins -> !meta.refinement.startsWith('dastool_refined') }
+            if ( params.postbinning_input != 'raw_bins_only' ) {
+                ch_depths_contig2bin = DASTOOL_BINNING_REFINEMENT.out.refined_contig2bin
+            }
+        }
         
-            DEPTHS ( ch_input_for_postbinning_bins_unbins, BINNING.out.metabat2depths, ch_short_reads_assembly )
+            DEPTHS ( ch_depths_bins_unbins, BINNING.out.metabat2depths, ch_short_reads_assembly, ch_depths_contig2bin )
                 ch_input_for_binsummary = DEPTHS.out.depths_summary
                 ch_versions = ch_versions.mix(DEPTHS.out.versions)
     /*